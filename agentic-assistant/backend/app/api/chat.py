@@ -1,4 +1,7 @@
+import asyncio
+import json
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 from app.chains.agent_workflows import AgentWorkflows
@@ -42,6 +45,8 @@ class MultiAgentRequest(BaseModel):
 class MultiAgentResponse(BaseModel):
     responses: Dict[str, str]
     session_ids: Dict[str, str]
+    # Agents that timed out or failed, with the reason; their response is a fallback message
+    errors: Dict[str, str] = {}
 
 @router.post("/", response_model=ChatResponse)
 async def chat_with_agent(chat_message: ChatMessage):
@@ -101,8 +106,8 @@ async def chat_with_multiple_agents(request: MultiAgentRequest):
         # Get workflows instance
         workflows = get_workflows()
         
-        # Process the query through multiple workflows
-        responses = await workflows.multi_agent_workflow(
+        # Process the query through multiple workflows concurrently
+        responses, errors = await workflows.run_agents(
             request.message,
             request.agent_ids,
             request.context
@@ -113,6 +118,8 @@ async def chat_with_multiple_agents(request: MultiAgentRequest):
         if request.user_id:
             supabase_service = get_supabase_service()
             for agent_id, response in responses.items():
+                if agent_id in errors:
+                    continue
                 session_data = await supabase_service.create_user_session(
                     request.user_id,
                     agent_id,
@@ -124,12 +131,81 @@ async def chat_with_multiple_agents(request: MultiAgentRequest):
         
         return MultiAgentResponse(
             responses=responses,
-            session_ids=session_ids
+            session_ids=session_ids,
+            errors=errors
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def sse_event(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def agent_event_stream(message: str, agent_ids: List[str], user_id: Optional[str], context: Optional[Dict]):
+    """
+    Server-sent events for one or more agents' streamed answers, interleaved:
+    "token" ({agent_id, content}) as text arrives, "done" ({agent_id}) or
+    "error" ({agent_id, error}) when an agent finishes, and a final "end"
+    ({session_ids, errors}). Each completed answer is saved as a session.
+    """
+    workflows = get_workflows()
+    saves = {}
+    errors = {}
+
+    async def save_session(agent_id: str, response: str):
+        # A failed save must not end the stream before "end" is sent
+        try:
+            session_data = await get_supabase_service().create_user_session(user_id, agent_id, message, response)
+            return session_data.get("id") if session_data else None
+        except Exception as e:
+            print(f"Error saving session for agent {agent_id}: {e}")
+            return None
+
+    async for event, agent_id, data in workflows.stream_agents(message, agent_ids, context):
+        if event == "token":
+            yield sse_event("token", {"agent_id": agent_id, "content": data})
+        elif event == "done":
+            if user_id:
+                saves[agent_id] = asyncio.create_task(save_session(agent_id, data))
+            yield sse_event("done", {"agent_id": agent_id})
+        else:
+            errors[agent_id] = data
+            yield sse_event("error", {"agent_id": agent_id, "error": data})
+
+    session_ids = {}
+    for agent_id, task in saves.items():
+        session_id = await task
+        if session_id:
+            session_ids[agent_id] = session_id
+    yield sse_event("end", {"session_ids": session_ids, "errors": errors})
+
+@router.post("/stream")
+async def stream_chat_with_agent(chat_message: ChatMessage):
+    """
+    Send a message to an AI agent and stream the response as server-sent events
+    """
+    persona = AgentPersonas.get_persona_by_id(chat_message.agent_id)
+    if not persona:
+        raise HTTPException(status_code=400, detail="Invalid agent ID")
+    return StreamingResponse(
+        agent_event_stream(chat_message.message, [chat_message.agent_id], chat_message.user_id, chat_message.context),
+        media_type="text/event-stream"
+    )
+
+@router.post("/multi-agent/stream")
+async def stream_chat_with_multiple_agents(request: MultiAgentRequest):
+    """
+    Send a message to multiple agents and stream their responses, interleaved and tagged by agent_id
+    """
+    for agent_id in request.agent_ids:
+        persona = AgentPersonas.get_persona_by_id(agent_id)
+        if not persona:
+            raise HTTPException(status_code=400, detail=f"Invalid agent ID: {agent_id}")
+    return StreamingResponse(
+        agent_event_stream(request.message, request.agent_ids, request.user_id, request.context),
+        media_type="text/event-stream"
+    )
+
 @router.get("/agents")
 async def list_agents():
     """
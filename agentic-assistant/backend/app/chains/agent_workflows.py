@@ -1,32 +1,71 @@
-from typing import Dict, List, Optional
-from app.services.openai_service import GitHubAIService
+import asyncio
+import os
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from app.services.openai_service import get_ai_service
 from app.agents.personas import AgentPersonas
 
+# Per-persona instructions appended to the user's query
+AGENT_INSTRUCTIONS = {
+    "startup_advisor": """Please provide comprehensive startup guidance including:
+1. Immediate actionable steps
+2. Strategic considerations
+3. Potential challenges and mitigation strategies
+4. Recommended next steps
+""",
+    "content_strategist": """Please provide comprehensive content strategy guidance including:
+1. Content strategy recommendations
+2. Channel-specific tactics
+3. Content calendar suggestions
+4. Performance metrics to track
+5. Implementation timeline
+""",
+    "technical_recruiter": """Please provide comprehensive recruitment guidance including:
+1. Role requirements and job description optimization
+2. Sourcing and outreach strategies
+3. Assessment and interview process recommendations
+4. Compensation and negotiation guidance
+5. Timeline and next steps
+""",
+}
+
+MULTI_AGENT_ERROR_MESSAGE = "I apologize, but I encountered an error while processing your request. Please try again."
+
 class AgentWorkflows:
     """Simplified workflows for different agent personas using GitHub AI directly"""
     
     def __init__(self):
-        self.ai_service = GitHubAIService()
+        # Shared service, so every workflow uses the same connection pool
+        self.ai_service = get_ai_service()
+        # Multi-agent requests: agents running at once, and each agent's time limit in seconds
+        self.multi_agent_concurrency = int(os.getenv("MULTI_AGENT_CONCURRENCY", "4"))
+        self.agent_timeout = float(os.getenv("MULTI_AGENT_TIMEOUT", "60"))
+        self.workflows = {
+            "startup_advisor": self.startup_guidance_workflow,
+            "content_strategist": self.content_planning_workflow,
+            "technical_recruiter": self.recruitment_process_workflow,
+        }
     
-    async def startup_guidance_workflow(self, query: str, context: Dict = None) -> str:
-        """Workflow for startup advisor persona"""
-        try:
-            persona = AgentPersonas.get_startup_advisor()
-            
-            # Create a structured prompt
-            context_str = str(context) if context else "No additional context provided"
-            
-            system_prompt = persona["system_prompt"]
-            user_message = f"""
+    def build_prompt(self, agent_id: str, query: str, context: Dict = None) -> Tuple[str, str]:
+        """Return the (system prompt, user message) an agent sends to the model"""
+        persona = {
+            "startup_advisor": AgentPersonas.get_startup_advisor,
+            "content_strategist": AgentPersonas.get_content_strategist,
+            "technical_recruiter": AgentPersonas.get_technical_recruiter,
+        }[agent_id]()
+        
+        # Create a structured prompt
+        context_str = str(context) if context else "No additional context provided"
+        user_message = f"""
 Context: {context_str}
 User Query: {query}
 
-Please provide comprehensive startup guidance including:
-1. Immediate actionable steps
-2. Strategic considerations
-3. Potential challenges and mitigation strategies
-4. Recommended next steps
-"""
+{AGENT_INSTRUCTIONS[agent_id]}"""
+        return persona["system_prompt"], user_message
+    
+    async def startup_guidance_workflow(self, query: str, context: Dict = None) -> str:
+        """Workflow for startup advisor persona"""
+        try:
+            system_prompt, user_message = self.build_prompt("startup_advisor", query, context)
             
             response = await self.ai_service.generate_with_system_prompt(
                 system_prompt=system_prompt,
@@ -42,22 +81,7 @@ Please provide comprehensive startup guidance including:
     async def content_planning_workflow(self, query: str, context: Dict = None) -> str:
         """Workflow for content strategist persona"""
         try:
-            persona = AgentPersonas.get_content_strategist()
-            
-            context_str = str(context) if context else "No additional context provided"
-            
-            system_prompt = persona["system_prompt"]
-            user_message = f"""
-Context: {context_str}
-User Query: {query}
-
-Please provide comprehensive content strategy guidance including:
-1. Content strategy recommendations
-2. Channel-specific tactics
-3. Content calendar suggestions
-4. Performance metrics to track
-5. Implementation timeline
-"""
+            system_prompt, user_message = self.build_prompt("content_strategist", query, context)
             
             response = await self.ai_service.generate_with_system_prompt(
                 system_prompt=system_prompt,
@@ -73,22 +97,7 @@ Please provide comprehensive content strategy guidance including:
     async def recruitment_process_workflow(self, query: str, context: Dict = None) -> str:
         """Workflow for technical recruiter persona"""
         try:
-            persona = AgentPersonas.get_technical_recruiter()
-            
-            context_str = str(context) if context else "No additional context provided"
-            
-            system_prompt = persona["system_prompt"]
-            user_message = f"""
-Context: {context_str}
-User Query: {query}
-
-Please provide comprehensive recruitment guidance including:
-1. Role requirements and job description optimization
-2. Sourcing and outreach strategies
-3. Assessment and interview process recommendations
-4. Compensation and negotiation guidance
-5. Timeline and next steps
-"""
+            system_prompt, user_message = self.build_prompt("technical_recruiter", query, context)
             
             response = await self.ai_service.generate_with_system_prompt(
                 system_prompt=system_prompt,
@@ -101,20 +110,89 @@ Please provide comprehensive recruitment guidance including:
             print(f"Error in recruitment process workflow: {e}")
             return f"I apologize, but I encountered an error while processing your recruitment request. Please try again or rephrase your question."
     
+    async def run_agents(self, query: str, agent_ids: List[str], context: Dict = None) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """Run several agents concurrently; returns (responses, errors by agent id).
+
+        At most multi_agent_concurrency agents run at once and each gets
+        agent_timeout seconds, so the request takes about as long as its
+        slowest agent. An agent that times out or fails gets a fallback
+        response and an entry in errors; the others are unaffected.
+        Agents call the model directly rather than through their workflow
+        methods, which turn failures into apology text.
+        """
+        semaphore = asyncio.Semaphore(self.multi_agent_concurrency)
+        agent_ids = [agent_id for agent_id in dict.fromkeys(agent_ids) if agent_id in self.workflows]
+
+        async def answer(agent_id: str) -> str:
+            system_prompt, user_message = self.build_prompt(agent_id, query, context)
+            response = await self.ai_service.complete_with_system_prompt(system_prompt, user_message)
+            return response.strip()
+
+        async def run(agent_id: str) -> Tuple[str, Optional[str]]:
+            async with semaphore:
+                try:
+                    async with asyncio.timeout(self.agent_timeout):
+                        response = await answer(agent_id)
+                    return response, None
+                except TimeoutError:
+                    print(f"Agent {agent_id} timed out after {self.agent_timeout}s")
+                    return MULTI_AGENT_ERROR_MESSAGE, f"timed out after {self.agent_timeout:g}s"
+                except Exception as e:
+                    print(f"Error in agent {agent_id}: {e}")
+                    return MULTI_AGENT_ERROR_MESSAGE, str(e)
+
+        results = await asyncio.gather(*(run(agent_id) for agent_id in agent_ids))
+        responses = {agent_id: response for agent_id, (response, _) in zip(agent_ids, results)}
+        errors = {agent_id: error for agent_id, (_, error) in zip(agent_ids, results) if error}
+        return responses, errors
+
+    async def stream_agents(self, query: str, agent_ids: List[str], context: Dict = None) -> AsyncIterator[Tuple[str, str, str]]:
+        """Stream several agents' responses interleaved on one iterator.
+
+        Yields (event, agent_id, data) as the model produces text: "token"
+        events carry the next piece of an agent's answer, then each agent ends
+        with "done" (data is the full answer) or "error" (data is the reason).
+        Concurrency and per-agent time limits are the same as run_agents.
+        """
+        semaphore = asyncio.Semaphore(self.multi_agent_concurrency)
+        agent_ids = [agent_id for agent_id in dict.fromkeys(agent_ids) if agent_id in self.workflows]
+        events: asyncio.Queue = asyncio.Queue()
+
+        async def run(agent_id: str):
+            parts = []
+            async with semaphore:
+                try:
+                    async with asyncio.timeout(self.agent_timeout):
+                        system_prompt, user_message = self.build_prompt(agent_id, query, context)
+                        async for token in self.ai_service.stream_with_system_prompt(system_prompt, user_message):
+                            parts.append(token)
+                            await events.put(("token", agent_id, token))
+                    await events.put(("done", agent_id, "".join(parts).strip()))
+                except TimeoutError:
+                    print(f"Agent {agent_id} timed out after {self.agent_timeout}s")
+                    await events.put(("error", agent_id, f"timed out after {self.agent_timeout:g}s"))
+                except Exception as e:
+                    print(f"Error streaming agent {agent_id}: {e}")
+                    await events.put(("error", agent_id, str(e)))
+
+        tasks = [asyncio.create_task(run(agent_id)) for agent_id in agent_ids]
+        try:
+            finished = 0
+            while finished < len(tasks):
+                event = await events.get()
+                if event[0] != "token":
+                    finished += 1
+                yield event
+        finally:
+            # The client may disconnect mid-stream
+            for task in tasks:
+                task.cancel()
+
     async def multi_agent_workflow(self, query: str, agent_ids: List[str], context: Dict = None) -> Dict[str, str]:
-        """Multi-agent workflow that chains responses across multiple agents"""
+        """Multi-agent workflow that fans a query out to multiple agents concurrently"""
         try:
-            results = {}
-            
-            for agent_id in agent_ids:
-                if agent_id == "startup_advisor":
-                    results[agent_id] = await self.startup_guidance_workflow(query, context)
-                elif agent_id == "content_strategist":
-                    results[agent_id] = await self.content_planning_workflow(query, context)
-                elif agent_id == "technical_recruiter":
-                    results[agent_id] = await self.recruitment_process_workflow(query, context)
-            
-            return results
+            responses, _ = await self.run_agents(query, agent_ids, context)
+            return responses
             
         except Exception as e:
             print(f"Error in multi-agent workflow: {e}")
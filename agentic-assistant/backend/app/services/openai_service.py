@@ -1,8 +1,10 @@
 import os
-from typing import Optional
-from azure.ai.inference import ChatCompletionsClient
+from typing import AsyncIterator, Optional
+import aiohttp
+from azure.ai.inference.aio import ChatCompletionsClient
 from azure.ai.inference.models import SystemMessage, UserMessage
 from azure.core.credentials import AzureKeyCredential
+from azure.core.pipeline.transport import AioHttpTransport
 
 class GitHubAIService:
     def __init__(self):
@@ -13,51 +15,121 @@ class GitHubAIService:
                 "GITHUB_CHAT_TOKEN environment variable is not set or is using placeholder value. "
                 "Please set it to your actual GitHub chat token in the .env file."
             )
-        
-        # Initialize GitHub AI chat client
+        self.github_chat_token = github_chat_token
+        self.endpoint = os.getenv("GITHUB_MODELS_ENDPOINT", "https://models.github.ai/inference")
+        self.chat_model = "openai/gpt-4.1"
+
+        # Connection pool and timeout settings (seconds)
+        self.max_connections = int(os.getenv("GITHUB_AI_MAX_CONNECTIONS", "100"))
+        self.keepalive_timeout = float(os.getenv("GITHUB_AI_KEEPALIVE_TIMEOUT", "30"))
+        self.connect_timeout = float(os.getenv("GITHUB_AI_CONNECT_TIMEOUT", "10"))
+        self.read_timeout = float(os.getenv("GITHUB_AI_READ_TIMEOUT", "120"))
+
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.chat_client: Optional[ChatCompletionsClient] = None
+
+    async def open(self):
+        """
+        Open the shared keep-alive connection pool and the async chat client
+        """
+        if self.chat_client is not None:
+            return
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+        )
         self.chat_client = ChatCompletionsClient(
-            endpoint="https://models.github.ai/inference",
-            credential=AzureKeyCredential(github_chat_token),
+            endpoint=self.endpoint,
+            credential=AzureKeyCredential(self.github_chat_token),
+            # Timeouts go on the transport; the client ignores them when given one
+            transport=AioHttpTransport(
+                session=self.session,
+                session_owner=False,
+                connection_timeout=self.connect_timeout,
+                read_timeout=self.read_timeout,
+            ),
         )
-        self.chat_model = "openai/gpt-4.1"
-    
+
+    async def close(self):
+        """
+        Close the chat client and its connection pool
+        """
+        if self.chat_client is not None:
+            await self.chat_client.close()
+            self.chat_client = None
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _complete(self, system_prompt: str, user_message: str, stream: bool = False):
+        # Opened in the app lifespan; scripts that skip it get a pool on first use.
+        if self.chat_client is None:
+            await self.open()
+        return await self.chat_client.complete(
+            messages=[
+                SystemMessage(system_prompt),
+                UserMessage(user_message),
+            ],
+            temperature=0.7,
+            top_p=1,
+            model=self.chat_model,
+            stream=stream
+        )
+
     async def generate_response(self, prompt: str, model: str = None) -> Optional[str]:
         """
         Generate a response using GitHub AI API
         """
         try:
-            response = self.chat_client.complete(
-                messages=[
-                    SystemMessage("You are a helpful assistant."),
-                    UserMessage(prompt),
-                ],
-                temperature=0.7,
-                top_p=1,
-                model=self.chat_model
-            )
+            response = await self._complete("You are a helpful assistant.", prompt)
             return response.choices[0].message.content
         except Exception as e:
             print(f"Error generating response: {e}")
             return None
-    
+
     async def generate_with_system_prompt(self, system_prompt: str, user_message: str, model: str = None) -> Optional[str]:
         """
         Generate a response with a system prompt
         """
         try:
-            response = self.chat_client.complete(
-                messages=[
-                    SystemMessage(system_prompt),
-                    UserMessage(user_message),
-                ],
-                temperature=0.7,
-                top_p=1,
-                model=self.chat_model
-            )
-            return response.choices[0].message.content
+            return await self.complete_with_system_prompt(system_prompt, user_message)
         except Exception as e:
             print(f"Error generating response: {e}")
             return None
 
+    async def complete_with_system_prompt(self, system_prompt: str, user_message: str) -> str:
+        """
+        Generate a response with a system prompt; errors and empty responses are raised to the caller
+        """
+        response = await self._complete(system_prompt, user_message)
+        content = response.choices[0].message.content
+        if not content:
+            raise ValueError("The model returned an empty response")
+        return content
+
+    async def stream_with_system_prompt(self, system_prompt: str, user_message: str) -> AsyncIterator[str]:
+        """
+        Stream a response with a system prompt, yielding text as the model generates it.
+        Errors are raised to the caller, which may already have sent part of the answer.
+        """
+        response = await self._complete(system_prompt, user_message, stream=True)
+        try:
+            async for update in response:
+                if update.choices and update.choices[0].delta.content:
+                    yield update.choices[0].delta.content
+        finally:
+            await response.aclose()
+
+# Lazy initialization so a missing token only fails the requests that need it
+_ai_service = None
+
+def get_ai_service() -> GitHubAIService:
+    global _ai_service
+    if _ai_service is None:
+        _ai_service = GitHubAIService()
+    return _ai_service
+
 # For backward compatibility, keep the old class name
-OpenAIService = GitHubAIService 
\ No newline at end of file
+OpenAIService = GitHubAIService
@@ -0,0 +1,128 @@
+import asyncio
+from typing import Callable, Dict, List, Optional
+
+class SessionWriter:
+    """
+    Write-behind buffer for session records.
+
+    Requests hand records to enqueue() and return immediately; a background
+    task bulk-inserts them once batch_size records are waiting or
+    flush_interval seconds have passed. A failed batch is retried with
+    exponential backoff up to max_retries times before it is dropped.
+    close() writes whatever is still buffered.
+
+    insert_batch is a blocking callable taking a list of records, run in a
+    worker thread, so any store (or an in-memory list) can stand in for
+    Supabase. It may see the same batch twice after a retry and should
+    ignore records it already has.
+    """
+
+    def __init__(
+        self,
+        insert_batch: Callable[[List[Dict]], None],
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        max_pending: int = 10000,
+    ):
+        self.insert_batch = insert_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_pending = max_pending
+
+        self.pending: List[Dict] = []
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.retries = 0
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    def start(self):
+        """
+        Start the background flush task on the running event loop
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def enqueue(self, record: Dict) -> bool:
+        """
+        Buffer a record for the next batch; returns False if the buffer is full and it was dropped
+        """
+        if len(self.pending) >= self.max_pending:
+            self.dropped += 1
+            print(f"Session buffer full ({self.max_pending} records), dropping session {record.get('id')}")
+            return False
+        self.pending.append(record)
+        # Started by the app lifespan; scripts that skip it get a flush task on first use.
+        self.start()
+        if len(self.pending) >= self.batch_size:
+            self._wake.set()
+        return True
+
+    async def flush(self):
+        """
+        Write every buffered record now, in batches of batch_size
+        """
+        async with self._flush_lock:
+            while self.pending:
+                batch = self.pending[:self.batch_size]
+                del self.pending[:self.batch_size]
+                try:
+                    await self._write(batch)
+                except asyncio.CancelledError:
+                    # Stopped mid-batch (shutdown); keep it for the final flush
+                    self.pending[:0] = batch
+                    raise
+
+    async def close(self):
+        """
+        Stop the background task and write what is still buffered
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                async with asyncio.timeout(self.flush_interval):
+                    await self._wake.wait()
+            except TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def _write(self, batch: List[Dict]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await asyncio.to_thread(self.insert_batch, batch)
+                self.written += len(batch)
+                self.batches += 1
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.dropped += len(batch)
+                    print(f"Error writing {len(batch)} sessions, giving up after {attempt + 1} attempts: {e}")
+                    return
+                self.retries += 1
+                print(f"Error writing {len(batch)} sessions (attempt {attempt + 1}), retrying: {e}")
+                await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+
+    def stats(self) -> Dict:
+        return {
+            "pending": len(self.pending),
+            "written": self.written,
+            "batches": self.batches,
+            "retries": self.retries,
+            "dropped": self.dropped,
+        }
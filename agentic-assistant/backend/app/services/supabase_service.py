@@ -1,7 +1,19 @@
+import asyncio
 import os
+import uuid
 from typing import Dict, List, Optional
+from postgrest import APIError, ReturnMethod
 from supabase import create_client, Client
 from datetime import datetime
+from app.services.session_writer import SessionWriter
+from app.services.ttl_cache import TTLCache
+
+# Email -> user (or None for "no such user"), shared by every SupabaseService
+_user_cache = TTLCache(
+    ttl=float(os.getenv("USER_CACHE_TTL", "60")),
+    negative_ttl=float(os.getenv("USER_CACHE_NEGATIVE_TTL", "5")),
+    max_entries=int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000")),
+)
 
 class SupabaseService:
     def __init__(self):
@@ -9,11 +21,18 @@ class SupabaseService:
             os.getenv("SUPABASE_URL"),
             os.getenv("SUPABASE_ANON_KEY")
         )
+        # Cleared if the get_user_by_email database function is missing (see DEPLOYMENT.md)
+        self.email_lookup_available = True
     
     async def create_user_session(self, user_id: str, agent_id: str, query: str, response: str) -> Dict:
-        """Save a user session with query and response"""
+        """Save a user session with query and response.
+
+        The session is buffered and written in the background by the shared
+        SessionWriter; its id is assigned here so it can be returned at once.
+        """
         try:
             data = {
+                "id": str(uuid.uuid4()),
                 "user_id": user_id,
                 "agent_id": agent_id,
                 "query": query,
@@ -21,54 +40,118 @@ class SupabaseService:
                 "created_at": datetime.utcnow().isoformat()
             }
             
-            result = self.supabase.table("user_sessions").insert(data).execute()
-            return result.data[0] if result.data else None
+            if not get_session_writer(self).enqueue(data):
+                return None
+            return data
         except Exception as e:
             print(f"Error creating user session: {e}")
             return None
     
+    def insert_user_sessions(self, sessions: List[Dict]):
+        """Bulk-insert sessions; ids already stored (a retried batch) are skipped"""
+        self.supabase.table("user_sessions")\
+            .upsert(sessions, on_conflict="id", ignore_duplicates=True, returning=ReturnMethod.minimal)\
+            .execute()
+    
     async def get_user_sessions(self, user_id: str) -> List[Dict]:
         """Get all sessions for a user"""
         try:
-            result = self.supabase.table("user_sessions")\
+            query = self.supabase.table("user_sessions")\
                 .select("*")\
                 .eq("user_id", user_id)\
-                .order("created_at", desc=True)\
-                .execute()
+                .order("created_at", desc=True)
+            # The client is blocking; keep its round trips off the event loop
+            result = await asyncio.to_thread(query.execute)
             return result.data
         except Exception as e:
             print(f"Error getting user sessions: {e}")
             return []
     
     async def get_user_by_email(self, email: str) -> Optional[Dict]:
-        """Get user by email"""
+        """Get user by email, from the local cache or an indexed lookup on auth.users"""
+        key = email.lower()
+        found, user = _user_cache.get(key)
+        if found:
+            return user
         try:
-            result = self.supabase.auth.admin.list_users()
-            for user in result.users:
-                if user.email == email:
+            if self.email_lookup_available:
+                user = await asyncio.to_thread(self._lookup_user_by_email, key)
+            else:
+                user = await asyncio.to_thread(self._scan_users_for_email, key)
+        except Exception as e:
+            # Not cached: the user may well exist
+            print(f"Error getting user by email: {e}")
+            return None
+        _user_cache.set(key, user)
+        return user
+    
+    def _lookup_user_by_email(self, email: str) -> Optional[Dict]:
+        try:
+            result = self.supabase.rpc("get_user_by_email", {"p_email": email}).execute()
+        except APIError as e:
+            if e.code != "PGRST202":
+                raise
+            print("Database function get_user_by_email not found, falling back to listing users (see DEPLOYMENT.md)")
+            self.email_lookup_available = False
+            return self._scan_users_for_email(email)
+        if not result.data:
+            return None
+        user = result.data[0]
+        return {
+            "id": user["id"],
+            "email": user["email"],
+            "created_at": user["created_at"]
+        }
+    
+    def _scan_users_for_email(self, email: str, per_page: int = 1000) -> Optional[Dict]:
+        # O(total users): pages through every account with the admin API
+        page = 1
+        while True:
+            result = self.supabase.auth.admin.list_users(page=page, per_page=per_page)
+            users = getattr(result, "users", result)
+            for user in users:
+                if user.email and user.email.lower() == email:
                     return {
                         "id": user.id,
                         "email": user.email,
-                        "created_at": user.created_at
+                        "created_at": str(user.created_at)
                     }
-            return None
-        except Exception as e:
-            print(f"Error getting user by email: {e}")
-            return None
+            if len(users) < per_page:
+                return None
+            page += 1
     
     async def create_user(self, email: str, password: str) -> Optional[Dict]:
         """Create a new user"""
+        # Drops a cached "no such user" from the registration check
+        _user_cache.invalidate(email.lower())
         try:
-            result = self.supabase.auth.admin.create_user({
+            result = await asyncio.to_thread(self.supabase.auth.admin.create_user, {
                 "email": email,
                 "password": password,
                 "email_confirm": True
             })
-            return {
+            user = {
                 "id": result.user.id,
                 "email": result.user.email,
-                "created_at": result.user.created_at
+                "created_at": str(result.user.created_at)
             }
+            _user_cache.set(email.lower(), user)
+            return user
         except Exception as e:
             print(f"Error creating user: {e}")
-            return None 
\ No newline at end of file
+            return None
+
+# One write-behind buffer per process, shared by every SupabaseService
+_session_writer = None
+
+def get_session_writer(supabase_service: SupabaseService = None) -> SessionWriter:
+    global _session_writer
+    if _session_writer is None:
+        supabase_service = supabase_service or SupabaseService()
+        _session_writer = SessionWriter(
+            supabase_service.insert_user_sessions,
+            batch_size=int(os.getenv("SESSION_BATCH_SIZE", "100")),
+            flush_interval=float(os.getenv("SESSION_FLUSH_INTERVAL", "1.0")),
+            max_retries=int(os.getenv("SESSION_MAX_RETRIES", "3")),
+        )
+    return _session_writer
@@ -0,0 +1,190 @@
+"""Load test for /api/chat against a local stand-in for the GitHub AI endpoint.
+
+Starts a fake chat-completions server with a fixed response delay and the
+API under uvicorn (pointed at it through GITHUB_MODELS_ENDPOINT), then sends
+N concurrent /api/chat requests for each N given. With non-blocking model
+calls throughput should grow roughly linearly with N until the connection
+pool (GITHUB_AI_MAX_CONNECTIONS) is full.
+
+With --stream the requests go to /api/chat/stream and the time to the first
+token is reported as well; the fake model spreads its delay over the tokens.
+
+    python benchmarks/chat_load_test.py --concurrency 1 4 16 64 --latency 0.5
+    python benchmarks/chat_load_test.py --stream --concurrency 1 16
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx  # noqa: E402
+
+
+ANSWER_TOKENS = ["A ", "canned ", "answer ", "from ", "the ", "fake ", "model."]
+
+
+def fake_model_app(latency: float):
+    from fastapi import FastAPI, Request
+    from fastapi.responses import StreamingResponse
+
+    app = FastAPI()
+
+    @app.post("/chat/completions")
+    async def chat(request: Request):
+        body = await request.json()
+        if body.get("stream"):
+            async def chunks():
+                for token in ANSWER_TOKENS:
+                    await asyncio.sleep(latency / len(ANSWER_TOKENS))
+                    chunk = {
+                        "id": "fake",
+                        "created": int(time.time()),
+                        "model": body.get("model", "fake"),
+                        "choices": [{"index": 0, "delta": {"role": "assistant", "content": token}, "finish_reason": None}],
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(chunks(), media_type="text/event-stream")
+        await asyncio.sleep(latency)
+        return {
+            "id": "fake",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": "".join(ANSWER_TOKENS)},
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_ready(url: str, proc: subprocess.Popen, timeout: float = 60) -> None:
+    start = time.perf_counter()
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{proc.args} exited with {proc.returncode}")
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+
+async def load(client, concurrency: int, requests_per_client: int, stream: bool = False) -> dict:
+    latencies, first_tokens, errors = [], [], 0
+    body = {"message": "How do I raise a seed round?", "agent_id": "startup_advisor"}
+
+    async def worker():
+        nonlocal errors
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            if not stream:
+                response = await client.post("/api/chat/", json=body)
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+            else:
+                async with client.stream("POST", "/api/chat/stream", json=body) as response:
+                    if response.status_code != 200:
+                        errors += 1
+                        continue
+                    first = None
+                    async for line in response.aiter_lines():
+                        if first is None and line == "event: token":
+                            first = time.perf_counter() - start
+                        if line == "event: error":
+                            errors += 1
+                    first_tokens.append(first)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    latencies.sort()
+    first_tokens = sorted(t for t in first_tokens if t is not None)
+    return {
+        "concurrency": concurrency,
+        "requests": concurrency * requests_per_client,
+        "errors": errors,
+        "requests_per_sec": round(len(latencies) / wall, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        "p95_ms": round(latencies[math.ceil(0.95 * len(latencies)) - 1] * 1000, 1) if latencies else None,
+        "first_token_p50_ms": round(statistics.median(first_tokens) * 1000, 1) if first_tokens else None,
+    }
+
+
+async def run(args) -> list[dict]:
+    model_port, api_port = free_port(), free_port()
+    fake = subprocess.Popen([
+        sys.executable, os.path.abspath(__file__), "--serve-fake", str(model_port), "--latency", str(args.latency),
+    ])
+    env = {
+        **os.environ,
+        "GITHUB_MODELS_ENDPOINT": f"http://127.0.0.1:{model_port}",
+        "GITHUB_CHAT_TOKEN": "load-test",
+    }
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(api_port), "--log-level", "warning"],
+        cwd=BACKEND,
+        env=env,
+    )
+    try:
+        await wait_ready(f"http://127.0.0.1:{model_port}/docs", fake)
+        await wait_ready(f"http://127.0.0.1:{api_port}/health", api)
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{api_port}", timeout=None, limits=limits) as client:
+            return [await load(client, n, args.requests, args.stream) for n in args.concurrency]
+    finally:
+        for proc in (api, fake):
+            proc.terminate()
+            proc.wait()
+
+
+def main(args):
+    if args.serve_fake:
+        import uvicorn
+
+        uvicorn.run(fake_model_app(args.latency), host="127.0.0.1", port=args.serve_fake, log_level="warning")
+        return
+    results = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"model latency {args.latency * 1000:.0f}ms, {args.requests} requests per client")
+    print(f"{'concurrency':>12}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'1st tok ms':>12}{'errors':>8}")
+    for r in results:
+        first = "-" if r["first_token_p50_ms"] is None else r["first_token_p50_ms"]
+        print(
+            f"{r['concurrency']:>12}{r['requests_per_sec']:>9.2f}{r['p50_ms']:>9}{r['p95_ms']:>9}{first:>12}{r['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=5, help="requests sent by each concurrent client")
+    parser.add_argument("--latency", type=float, default=0.5, help="fake model response time in seconds")
+    parser.add_argument("--stream", action="store_true", help="use /api/chat/stream and report time to first token")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--serve-fake", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    main(parser.parse_args())
@@ -0,0 +1,116 @@
+"""Request-path cost of saving chat sessions: inline inserts vs the write-behind SessionWriter.
+
+Sessions go to an in-memory stand-in for the user_sessions table that
+takes --rtt seconds per round trip, fails --failure-rate of calls, and,
+like the upsert SupabaseService uses, ignores ids it already has. Each
+simulated multi-agent request saves one session per agent. After close()
+the table is checked to hold every session exactly once.
+
+    python benchmarks/session_writer_bench.py --requests 200 --agents 3 --rtt 0.03
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.session_writer import SessionWriter  # noqa: E402
+
+
+class FakeSessionTable:
+    def __init__(self, rtt: float, failure_rate: float, seed: int = 0):
+        self.rtt = rtt
+        self.failure_rate = failure_rate
+        self.rows = {}
+        self.calls = 0
+        self.rnd = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def insert(self, sessions):
+        time.sleep(self.rtt)
+        with self.lock:
+            self.calls += 1
+            if self.rnd.random() < self.failure_rate:
+                raise ConnectionError("simulated PostgREST failure")
+            for session in sessions:
+                self.rows.setdefault(session["id"], session)
+
+
+def session(agent_id):
+    return {"id": str(uuid.uuid4()), "user_id": "bench", "agent_id": agent_id, "query": "q", "response": "r"}
+
+
+async def run(args, write_behind: bool) -> dict:
+    table = FakeSessionTable(args.rtt, args.failure_rate)
+    writer = SessionWriter(table.insert, batch_size=args.batch_size, flush_interval=args.flush_interval, retry_backoff=0.01)
+    latencies = []
+
+    async def request():
+        start = time.perf_counter()
+        for i in range(args.agents):
+            record = session(f"agent-{i}")
+            if write_behind:
+                writer.enqueue(record)
+            else:
+                await asyncio.to_thread(table.insert, [record])
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def limited():
+        async with semaphore:
+            await request()
+
+    await asyncio.gather(*(limited() for _ in range(args.requests)))
+    served = time.perf_counter() - start
+    await writer.close()
+    expected = args.requests * args.agents
+    latencies.sort()
+    return {
+        "mode": "write-behind" if write_behind else "inline",
+        "save_p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "save_p95_ms": round(latencies[math.ceil(0.95 * len(latencies)) - 1] * 1000, 2),
+        "requests_per_sec": round(args.requests / served, 1),
+        "round_trips": table.calls,
+        "stored": len(table.rows),
+        "expected": expected,
+        "writer": writer.stats() if write_behind else None,
+    }
+
+
+def main(args):
+    # Inline saves have no retries, so only the write-behind run sees failures
+    inline = asyncio.run(run(argparse.Namespace(**{**vars(args), "failure_rate": 0.0}), False))
+    results = [inline, asyncio.run(run(args, True))]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.requests} requests x {args.agents} agents, rtt {args.rtt * 1000:.0f}ms, failure rate {args.failure_rate:.0%}")
+    print(f"{'mode':<14}{'p50 ms':>9}{'p95 ms':>9}{'req/s':>9}{'round trips':>13}{'stored':>9}")
+    for r in results:
+        print(
+            f"{r['mode']:<14}{r['save_p50_ms']:>9}{r['save_p95_ms']:>9}{r['requests_per_sec']:>9}"
+            f"{r['round_trips']:>13}{r['stored']:>5}/{r['expected']}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--agents", type=int, default=3, help="sessions saved per request")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rtt", type=float, default=0.03, help="seconds per database round trip")
+    parser.add_argument("--failure-rate", type=float, default=0.1, help="fraction of batch inserts that fail")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--flush-interval", type=float, default=1.0)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    main(parser.parse_args())
@@ -0,0 +1,115 @@
+"""Latency of SupabaseService.get_user_by_email as the user count grows.
+
+Compares the admin-API scan (list every user page by page), the indexed
+get_user_by_email database function, and a hit in the local TTL cache.
+Supabase is replaced by an in-process stand-in: list_users pages over a
+list of user objects, and the database function is a query on an indexed
+SQLite table. --rtt adds a delay per call to model network round trips,
+which the scan pays once per page of 1000 users.
+
+    python benchmarks/user_lookup_bench.py --users 1000 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import supabase_service  # noqa: E402
+
+
+class FakeUser:
+    __slots__ = ("id", "email", "created_at")
+
+    def __init__(self, id, email, created_at):
+        self.id = id
+        self.email = email
+        self.created_at = created_at
+
+
+class FakeSupabase:
+    def __init__(self, n: int, rtt: float):
+        self.rtt = rtt
+        self.users = [FakeUser(str(uuid.UUID(int=i)), f"user{i}@example.com", "2024-01-01T00:00:00+00:00") for i in range(n)]
+        self.db = sqlite3.connect(":memory:", check_same_thread=False)
+        self.db.execute("create table users (id text, email text, created_at text)")
+        self.db.executemany("insert into users values (?, ?, ?)", ((u.id, u.email, u.created_at) for u in self.users))
+        self.db.execute("create unique index users_email on users (email)")
+        self.auth = SimpleNamespace(admin=SimpleNamespace(list_users=self.list_users))
+
+    def wait(self):
+        if self.rtt:
+            time.sleep(self.rtt)
+
+    def list_users(self, page=1, per_page=50):
+        self.wait()
+        return self.users[(page - 1) * per_page:page * per_page]
+
+    def rpc(self, name, params):
+        def execute():
+            self.wait()
+            rows = self.db.execute(
+                "select id, email, created_at from users where email = lower(?) limit 1", (params["p_email"],)
+            ).fetchall()
+            return SimpleNamespace(data=[dict(zip(("id", "email", "created_at"), row)) for row in rows])
+
+        return SimpleNamespace(execute=execute)
+
+
+async def time_lookups(service, emails) -> float:
+    latencies = []
+    for email in emails:
+        start = time.perf_counter()
+        user = await service.get_user_by_email(email)
+        latencies.append(time.perf_counter() - start)
+        assert user is not None and user["email"] == email
+    return statistics.median(latencies) * 1000
+
+
+def main(args):
+    rows = []
+    cache = supabase_service._user_cache
+    for n in args.users:
+        fake = FakeSupabase(n, args.rtt)
+        with mock.patch.object(supabase_service, "create_client", lambda *a: fake):
+            service = supabase_service.SupabaseService()
+        rnd = random.Random(0)
+        emails = [f"user{rnd.randrange(n)}@example.com" for _ in range(args.lookups)]
+
+        cache.ttl = cache.negative_ttl = 0
+        service.email_lookup_available = False
+        scan_ms = asyncio.run(time_lookups(service, emails[:args.scan_lookups]))
+        service.email_lookup_available = True
+        indexed_ms = asyncio.run(time_lookups(service, emails))
+        cache.ttl, cache.negative_ttl = 60, 5
+        asyncio.run(time_lookups(service, emails))  # warm
+        cached_ms = asyncio.run(time_lookups(service, emails))
+        rows.append({"users": n, "scan_ms": round(scan_ms, 3), "indexed_ms": round(indexed_ms, 3), "cached_ms": round(cached_ms, 4)})
+        del fake, service
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"median get_user_by_email latency, rtt {args.rtt * 1000:.0f}ms per call")
+    print(f"{'users':>9}{'scan ms':>12}{'indexed ms':>12}{'cached ms':>11}")
+    for r in rows:
+        print(f"{r['users']:>9}{r['scan_ms']:>12.3f}{r['indexed_ms']:>12.3f}{r['cached_ms']:>11.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--rtt", type=float, default=0.0, help="seconds added to every Supabase call")
+    parser.add_argument("--lookups", type=int, default=200, help="lookups timed for the indexed and cached paths")
+    parser.add_argument("--scan-lookups", type=int, default=5, help="lookups timed for the scan")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    main(parser.parse_args())
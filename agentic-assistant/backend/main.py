@@ -1,16 +1,42 @@
 import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import router
+from app.services.openai_service import get_ai_service
+from app.services.supabase_service import get_session_writer
 
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One keep-alive connection pool to GitHub AI for the whole process
+    ai_service = None
+    try:
+        ai_service = get_ai_service()
+        await ai_service.open()
+    except ValueError as e:
+        print(f"GitHub AI service not started: {e}")
+    # Background batch writer for chat sessions, flushed before exit
+    session_writer = None
+    try:
+        session_writer = get_session_writer()
+        session_writer.start()
+    except Exception as e:
+        print(f"Session writer not started: {e}")
+    yield
+    if session_writer is not None:
+        await session_writer.close()
+    if ai_service is not None:
+        await ai_service.close()
+
 app = FastAPI(
     title="Agentic Assistant API",
     description="A FastAPI backend for the persona-driven agentic assistant application",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
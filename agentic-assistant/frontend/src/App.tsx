@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import ChatInterface from './components/ChatInterface';
-import { getAgents, sendChatMessage, Agent } from './services/api';
+import { getAgents, streamChatMessage, Agent } from './services/api';
 import { Bot, MessageSquare, Settings, Users, Sparkles, Zap, LogOut } from 'lucide-react';
 import './styles/App.css';
 import LoginPage from './pages/LoginPage';
@@ -55,22 +55,34 @@ function App() {
       };
       setMessages(prev => [...prev, userMessage]);
 
-      // Send message to API, include user_id
-      const response = await sendChatMessage({
-        message,
-        agent_id: agentId,
-        user_id: user?.id,
-      });
-
-      // Add agent response to chat
-      const agentMessage: Message = {
-        id: (Date.now() + 1).toString(),
-        content: response.response,
+      // Add an empty agent message and fill it in as the response streams
+      const agentMessageId = (Date.now() + 1).toString();
+      setMessages(prev => [...prev, {
+        id: agentMessageId,
+        content: '',
         sender: 'agent',
         timestamp: new Date(),
-        agentId: response.agent_id,
+        agentId,
+      }]);
+      const updateAgentMessage = (update: (content: string) => string) => {
+        setMessages(prev => prev.map(m => (m.id === agentMessageId ? { ...m, content: update(m.content) } : m)));
       };
-      setMessages(prev => [...prev, agentMessage]);
+
+      // Send message to API, include user_id
+      await streamChatMessage(
+        {
+          message,
+          agent_id: agentId,
+          user_id: user?.id,
+        },
+        ({ event, data }) => {
+          if (event === 'token') {
+            updateAgentMessage(content => content + data.content);
+          } else if (event === 'error') {
+            updateAgentMessage(() => `I apologize, but I could not answer: ${data.error}`);
+          }
+        }
+      );
 
     } catch (err) {
       setError('Failed to send message');
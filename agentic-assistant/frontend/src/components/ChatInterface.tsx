@@ -37,12 +37,14 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({
   }, [messages]);
 
   useEffect(() => {
-    if (isLoading) {
+    // Hide the indicator once a streamed answer starts showing text
+    const last = messages[messages.length - 1];
+    if (isLoading && !(last?.sender === 'agent' && last.content)) {
       setIsTyping(true);
     } else {
       setIsTyping(false);
     }
-  }, [isLoading]);
+  }, [isLoading, messages]);
 
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
@@ -104,7 +106,7 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({
             <p className="text-gray-300">Ask me anything about {selectedAgent.description.toLowerCase()}</p>
           </div>
         ) : (
-          messages.map((message) => (
+          messages.filter((message) => message.sender === 'user' || message.content).map((message) => (
             <div
               key={message.id}
               className={`flex ${message.sender === 'user' ? 'justify-end' : 'justify-start'}`}
@@ -72,7 +72,7 @@ export const sendMultiAgentMessage = async (
   agentIds: string[],
   userId?: string,
   context?: Record<string, any>
-): Promise<{ responses: Record<string, string>; session_ids: Record<string, string> }> => {
+): Promise<{ responses: Record<string, string>; session_ids: Record<string, string>; errors?: Record<string, string> }> => {
   const response = await api.post('/chat/multi-agent', {
     message,
     agent_ids: agentIds,
@@ -82,6 +82,52 @@ export const sendMultiAgentMessage = async (
   return response.data;
 };
 
+export interface StreamEvent {
+  event: 'token' | 'done' | 'error' | 'end';
+  data: any;
+}
+
+// Streams server-sent events from a POST endpoint; axios cannot read a response body incrementally
+const streamEvents = async (path: string, body: any, onEvent: (event: StreamEvent) => void): Promise<void> => {
+  const response = await fetch(`${API_BASE_URL}${path}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      ...(api.defaults.headers.common['Authorization']
+        ? { Authorization: String(api.defaults.headers.common['Authorization']) }
+        : {}),
+    },
+    body: JSON.stringify(body),
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`Stream request failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = 'message';
+      let data = '';
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      if (data) onEvent({ event: event as StreamEvent['event'], data: JSON.parse(data) });
+    }
+  }
+};
+
+export const streamChatMessage = (message: ChatMessage, onEvent: (event: StreamEvent) => void): Promise<void> =>
+  streamEvents('/chat/stream', message, onEvent);
+
 // Session APIs
 export const getUserSessions = async (userId: string, limit?: number): Promise<UserSession[]> => {
   const params = limit ? { limit } : {};
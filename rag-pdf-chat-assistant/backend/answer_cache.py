@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    sources: list[dict]
+    scope: tuple | None
+    namespace: str | None
+    vector: np.ndarray
+    created_at: float = field(default_factory=time.monotonic)
+
+
+def normalize(vector) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+
+class SemanticAnswerCache:
+    """Answers keyed by question embedding, served for near-duplicate questions.
+
+    A lookup hits when a cached question in the same document scope has
+    cosine similarity >= ``threshold`` with the new one. Entries are evicted
+    LRU beyond ``max_entries`` and expire after ``ttl`` seconds. Entries
+    are grouped by ``namespace`` (one per session corpus); a namespace's
+    entries are dropped whenever its corpus version changes, since their
+    answers may cite documents that are gone or miss ones that were added.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 1024, ttl: float = 3600):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.versions: dict[str | None, int] = {}
+        self.entries: OrderedDict[int, CachedAnswer] = OrderedDict()
+        self._next_key = 0
+        self._matrix = None
+        self._keys: list[int] = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, namespace, version) -> None:
+        if self.versions.get(namespace, version) != version:
+            stale = [key for key, entry in self.entries.items() if entry.namespace == namespace]
+            for key in stale:
+                del self.entries[key]
+            if stale:
+                self.invalidations += 1
+                self._matrix = None
+        self.versions[namespace] = version
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        expired = [key for key, entry in self.entries.items() if entry.created_at < cutoff]
+        for key in expired:
+            del self.entries[key]
+        if expired:
+            self._matrix = None
+
+    def lookup(self, vector, version, doc_ids=None, namespace=None) -> tuple[CachedAnswer, float] | None:
+        scope = tuple(sorted(doc_ids)) if doc_ids else None
+        query = normalize(vector)
+        with self._lock:
+            self._check_version(namespace, version)
+            self._expire()
+            if self.entries:
+                if self._matrix is None:
+                    self._keys = list(self.entries)
+                    self._matrix = np.stack([self.entries[k].vector for k in self._keys])
+                similarities = self._matrix @ query
+                for i in np.argsort(-similarities):
+                    if similarities[i] < self.threshold:
+                        break
+                    key = self._keys[i]
+                    entry = self.entries[key]
+                    if entry.scope == scope and entry.namespace == namespace:
+                        self.entries.move_to_end(key)
+                        self.hits += 1
+                        return entry, float(similarities[i])
+            self.misses += 1
+            return None
+
+    def store(self, vector, version, doc_ids, answer: str, sources: list[dict], namespace=None) -> None:
+        scope = tuple(sorted(doc_ids)) if doc_ids else None
+        with self._lock:
+            self._check_version(namespace, version)
+            self.entries[self._next_key] = CachedAnswer(answer, sources, scope, namespace, normalize(vector))
+            self._next_key += 1
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
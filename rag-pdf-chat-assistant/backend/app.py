@@ -1,15 +1,47 @@
+import asyncio
+import json
 import os
-import shutil
-from fastapi import FastAPI, UploadFile, File, Form
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from answer_cache import SemanticAnswerCache
+from index_cache import IndexCache, index_key
+from index_factory import IndexConfig
+from ingestion import IngestJob, IngestionPipeline, IngestionQueue
+from session_registry import SessionRegistry, valid_session_id
+from upload_store import UploadStore, UploadTooLarge
 from rag_pipeline import (
-    load_and_split_pdf,
-    create_vectorstore,
-    get_top_k_docs,
+    CHUNK_OVERLAP,
+    CHUNK_SIZE,
+    DEDUP_THRESHOLD,
+    close_clients,
+    embedding_model,
+    embeddings,
+    get_context,
+    get_contexts,
     generate_answer,
+    stream_answer,
 )
 
-app = FastAPI()
+# PDF parsing is pure-Python CPU work; a process pool keeps it off both the
+# event loop and the GIL that request handlers share.
+parse_workers = int(os.getenv("PARSE_WORKERS", "2"))
+parse_pool = ProcessPoolExecutor(max_workers=parse_workers)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await ingestion_queue.start()
+    sweeper = asyncio.create_task(upload_store.run_sweeper(pending_uploads))
+    yield
+    sweeper.cancel()
+    await ingestion_queue.stop()
+    parse_pool.shutdown(cancel_futures=True)
+    await close_clients()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,25 +51,322 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-vectorstore = None
+# Each session (X-Session-Id header) has its own corpus, published to
+# SESSION_DIR on every change and memory-mapped by all worker processes;
+# loaded ones are dropped once SESSION_MAX_BYTES is exceeded. Each change
+# rewrites the whole session, so one session may not grow past
+# SESSION_CORPUS_MAX_BYTES.
+sessions = SessionRegistry(
+    embeddings,
+    IndexConfig.from_env(),
+    os.getenv("SESSION_DIR", "sessions"),
+    max_bytes=int(os.getenv("SESSION_MAX_BYTES", str(1024**3))),
+    max_session_bytes=int(os.getenv("SESSION_CORPUS_MAX_BYTES", str(256 * 1024**2))),
+)
+
+index_cache = IndexCache(
+    os.getenv("INDEX_CACHE_DIR", "index_cache"),
+    max_bytes=int(os.getenv("INDEX_CACHE_MAX_BYTES", str(2 * 1024**3))),
+)
+
+# Answers generated at once by a single /ask/batch/ request
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "1000"))
+
+answer_cache = SemanticAnswerCache(
+    threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")),
+    max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1024")),
+    ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+)
+
+ingestion_pipeline = IngestionPipeline(
+    sessions,
+    index_cache,
+    parse_pool,
+    page_batch=int(os.getenv("PARSE_PAGES_PER_TASK", "8")),
+    # Two page ranges per worker keeps every worker busy while bounding memory.
+    parse_window=2 * parse_workers,
+    embed_concurrency=embeddings.batcher.concurrency,
+)
+
+ingestion_queue = IngestionQueue(
+    ingestion_pipeline.run,
+    max_pending=int(os.getenv("INGEST_MAX_PENDING", "16")),
+    workers=int(os.getenv("INGEST_WORKERS", "2")),
+    status_dir=os.getenv("JOB_STATUS_DIR", "temp/jobs"),
+)
+
+# Uploads are streamed here and deleted once ingested; anything older than
+# UPLOAD_TTL seconds that no job of this process still needs is swept away.
+upload_store = UploadStore(
+    os.getenv("UPLOAD_DIR", "temp/uploads"),
+    ttl=float(os.getenv("UPLOAD_TTL", "3600")),
+    max_bytes=int(os.getenv("UPLOAD_MAX_BYTES", "0")) or None,
+)
+
+def pending_uploads() -> set[str]:
+    return {job.path for job in ingestion_queue.jobs.values() if job.finished_at is None}
+
+def session_id(x_session_id: str | None) -> str:
+    session = x_session_id or "default"
+    if not valid_session_id(session):
+        raise HTTPException(status_code=400, detail="X-Session-Id must be 1-64 letters, digits, '-' or '_'.")
+    return session
+
+def queue_full_response() -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"error": "Ingestion queue is full, please retry shortly."},
+        headers={"Retry-After": "10"},
+    )
+
+async def find_duplicate(session: str, doc_id: str, content_hash: str):
+    """A response for an upload whose content is already queued or ingested under ``doc_id``."""
+    for job in ingestion_queue.jobs.values():
+        if (job.session_id, job.doc_id, job.content_hash) == (session, doc_id, content_hash) and job.finished_at is None:
+            return {"message": "File is already being processed", "duplicate": True, **job.to_dict()}
+    async with sessions.use(session) as corpus:
+        info = corpus.documents.get(doc_id)
+    if info is not None and info.get("content_hash") == content_hash:
+        return JSONResponse(
+            status_code=200,
+            content={"message": "Document already ingested", "duplicate": True, "doc_id": doc_id, "status": "done"},
+        )
+    return None
+
+@app.post("/upload/", status_code=202)
+async def upload_pdf(
+    file: UploadFile = File(...),
+    doc_id: str | None = Form(None),
+    x_session_id: str | None = Header(None),
+):
+    session = session_id(x_session_id)
+    if ingestion_queue.queue.full():
+        return queue_full_response()
+    try:
+        path, content_hash, _ = await upload_store.save(file)
+    except UploadTooLarge as e:
+        return JSONResponse(status_code=413, content={"error": str(e)})
+    # Re-uploading the same file without an explicit id replaces it in place.
+    doc_id = doc_id or content_hash[:16]
 
-@app.post("/upload/")
-async def upload_pdf(file: UploadFile = File(...)):
-    file_location = f"temp/{file.filename}"
-    os.makedirs("temp", exist_ok=True)
-    with open(file_location, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+    # Identical content needs no second parse; only the copy is thrown away.
+    duplicate = await find_duplicate(session, doc_id, content_hash)
+    if duplicate is not None:
+        upload_store.discard(path)
+        return duplicate
 
-    chunks = load_and_split_pdf(file_location)
-    global vectorstore
-    vectorstore = create_vectorstore(chunks)
+    key = index_key(content_hash, CHUNK_SIZE, CHUNK_OVERLAP, embedding_model, DEDUP_THRESHOLD)
+    job = IngestJob(
+        doc_id=doc_id, filename=file.filename, path=path, key=key, session_id=session, content_hash=content_hash
+    )
+    try:
+        ingestion_queue.submit(job)
+    except asyncio.QueueFull:
+        upload_store.discard(path)
+        return queue_full_response()
+    return {"message": "File queued for processing", **job.to_dict()}
 
-    return {"message": "File uploaded and processed"}
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = ingestion_queue.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": f"Unknown job id: {job_id}"})
+    return job
+
+@app.get("/documents/")
+async def list_documents(x_session_id: str | None = Header(None)):
+    async with sessions.use(session_id(x_session_id)) as corpus:
+        return {"documents": corpus.list_documents()}
+
+@app.delete("/documents/{doc_id}")
+async def delete_document(doc_id: str, x_session_id: str | None = Header(None)):
+    async with sessions.write(session_id(x_session_id)) as corpus:
+        deleted = await asyncio.to_thread(corpus.delete_document, doc_id)
+    if not deleted:
+        return {"error": f"Unknown document id: {doc_id}"}
+    return {"message": "Document deleted", "doc_id": doc_id}
+
+@app.get("/stats/")
+async def cache_stats():
+    return {
+        "index_cache": await asyncio.to_thread(index_cache.stats),
+        "ingestion_queue_depth": ingestion_queue.depth,
+        "embedding_cache": await asyncio.to_thread(embeddings.cache.stats) if embeddings.cache else None,
+        "answer_cache": answer_cache.stats(),
+        "dedup": ingestion_pipeline.dedup_totals,
+        "sessions": await asyncio.to_thread(sessions.stats),
+        "uploads": await asyncio.to_thread(upload_store.stats),
+    }
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def doc_to_source(doc) -> dict:
+    return {
+        "doc_id": doc.metadata.get("doc_id"),
+        "page": doc.metadata.get("page"),
+        "also_on_pages": doc.metadata.get("also_on_pages", []),
+        "content": doc.page_content,
+    }
+
+async def embed_question(question: str, timings: dict):
+    start = time.perf_counter()
+    vector = await embeddings.aembed_query(question)
+    timings["embed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return vector
+
+async def retrieve(session: str, question: str, doc_ids, timings: dict):
+    """Answer-cache lookup, then retrieval on a miss; None if the session has no documents."""
+    async with sessions.use(session) as corpus:
+        if corpus.num_chunks == 0:
+            return None
+        vector = await embed_question(question, timings)
+        version = corpus.version
+        hit = answer_cache.lookup(vector, version, doc_ids, namespace=session)
+        docs, context = [], None
+        if hit is None:
+            docs, context = await get_context(corpus, question, vector, doc_ids=doc_ids, timings=timings)
+    return vector, version, hit, docs, context
 
 @app.post("/ask/")
-async def ask_question(question: str = Form(...)):
-    if vectorstore is None:
+async def ask_question(
+    question: str = Form(...),
+    doc_ids: list[str] | None = Form(None),
+    x_session_id: str | None = Header(None),
+):
+    session = session_id(x_session_id)
+    timings = {}
+    result = await retrieve(session, question, doc_ids, timings)
+    if result is None:
+        return {"error": "Please upload a document first."}
+    vector, version, hit, docs, context = result
+    if hit is not None:
+        entry, similarity = hit
+        return {"answer": entry.answer, "cached": True, "similarity": similarity, "timings": timings}
+
+    answer = await generate_answer(docs, question)
+    answer_cache.store(vector, version, doc_ids, answer, [doc_to_source(doc) for doc in docs], namespace=session)
+    return {"answer": answer, "cached": False, "timings": timings, "context": context}
+
+@app.post("/ask/stream/")
+async def ask_question_stream(
+    question: str = Form(...),
+    doc_ids: list[str] | None = Form(None),
+    x_session_id: str | None = Header(None),
+):
+    session = session_id(x_session_id)
+    timings = {}
+    result = await retrieve(session, question, doc_ids, timings)
+    if result is None:
         return {"error": "Please upload a document first."}
-    docs = get_top_k_docs(vectorstore, question)
-    answer = generate_answer(docs, question)
-    return {"answer": answer}
+    vector, version, hit, docs, context = result
+
+    async def events():
+        if hit is not None:
+            entry, similarity = hit
+            yield sse_event("sources", entry.sources)
+            yield sse_event("timings", {**timings, "cached": True, "similarity": similarity})
+            yield sse_event("token", {"text": entry.answer})
+            yield sse_event("done", {})
+            return
+
+        # Sources go out before the first token so citations render immediately.
+        sources = [doc_to_source(doc) for doc in docs]
+        yield sse_event("sources", sources)
+        yield sse_event("timings", timings)
+        yield sse_event("context", context)
+        parts = []
+        try:
+            async for token in stream_answer(docs, question):
+                parts.append(token)
+                yield sse_event("token", {"text": token})
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+        else:
+            answer_cache.store(vector, version, doc_ids, "".join(parts), sources, namespace=session)
+        yield sse_event("done", {})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/ask/batch/")
+async def ask_batch(
+    questions: list[str] = Form(...),
+    doc_ids: list[str] | None = Form(None),
+    x_session_id: str | None = Header(None),
+):
+    """Answer many questions against the same documents.
+
+    The questions are embedded together and searched with one index query;
+    answers are generated BATCH_CONCURRENCY at a time and streamed back as
+    newline-delimited JSON in completion order (each line carries the
+    question's ``index``), followed by a summary line with ``"done": true``.
+    """
+    session = session_id(x_session_id)
+    if len(questions) > BATCH_MAX_QUESTIONS:
+        return {"error": f"At most {BATCH_MAX_QUESTIONS} questions per batch."}
+    start = time.perf_counter()
+    timings = {}
+    async with sessions.use(session) as corpus:
+        if corpus.num_chunks == 0:
+            return {"error": "Please upload a document first."}
+        t = time.perf_counter()
+        vectors = await embeddings.aembed_queries(questions)
+        timings["embed_ms"] = round((time.perf_counter() - t) * 1000, 2)
+        version = corpus.version
+        hits = [answer_cache.lookup(v, version, doc_ids, namespace=session) for v in vectors]
+        misses = [i for i, hit in enumerate(hits) if hit is None]
+        contexts = await get_contexts(
+            corpus, [questions[i] for i in misses], [vectors[i] for i in misses], doc_ids, timings
+        )
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def answer(i, docs, context):
+        async with semaphore:
+            try:
+                text = await generate_answer(docs, questions[i])
+            except Exception as e:
+                print(f"Error answering batch question {i}: {e}")
+                return {"index": i, "question": questions[i], "error": str(e)}
+        sources = [doc_to_source(doc) for doc in docs]
+        answer_cache.store(vectors[i], version, doc_ids, text, sources, namespace=session)
+        return {
+            "index": i,
+            "question": questions[i],
+            "answer": text,
+            "cached": False,
+            "sources": sources,
+            "context": context,
+        }
+
+    async def results():
+        for i, hit in enumerate(hits):
+            if hit is not None:
+                entry, similarity = hit
+                line = {
+                    "index": i,
+                    "question": questions[i],
+                    "answer": entry.answer,
+                    "cached": True,
+                    "similarity": similarity,
+                    "sources": entry.sources,
+                }
+                yield json.dumps(line) + "\n"
+        tasks = [asyncio.create_task(answer(i, docs, context)) for i, (docs, context) in zip(misses, contexts)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished) + "\n"
+        finally:
+            # Stop generating if the client goes away mid-stream.
+            for task in tasks:
+                task.cancel()
+        timings["total_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        summary = {"done": True, "questions": len(questions), "cached": len(questions) - len(misses)}
+        yield json.dumps({**summary, "timings": timings}) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
@@ -0,0 +1,94 @@
+"""Compare answering N questions with sequential /ask/ calls against one /ask/batch/ call.
+
+Runs the FastAPI app in-process against fake model clients. With bounded
+concurrency the batch should finish in roughly ceil(N / BATCH_CONCURRENCY)
+chat latencies instead of N.
+
+    BATCH_CONCURRENCY=32 python benchmarks/batch_check.py --questions 100 --chat-latency 0.5 --jitter 0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+WORKDIR = tempfile.mkdtemp(prefix="rag-bench-")
+os.environ.setdefault("GITHUB_EMBEDDING_TOKEN", "offline")
+os.environ.setdefault("GITHUB_CHAT_TOKEN", "offline")
+os.environ["INDEX_CACHE_DIR"] = os.path.join(WORKDIR, "index_cache")
+os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(WORKDIR, "embeddings.sqlite3")
+os.environ["SESSION_DIR"] = os.path.join(WORKDIR, "sessions")
+os.environ["JOB_STATUS_DIR"] = os.path.join(WORKDIR, "jobs")
+os.environ["UPLOAD_DIR"] = os.path.join(WORKDIR, "uploads")
+os.environ["BATCH_CONCURRENCY"] = os.environ.get("BATCH_CONCURRENCY", "32")
+# Distinct questions must not be served from each other's cached answers.
+os.environ["ANSWER_CACHE_THRESHOLD"] = "1.01"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+import rag_pipeline  # noqa: E402
+from benchmarks.concurrency_check import upload_and_wait  # noqa: E402
+from benchmarks.synthetic import FakeAsyncChatClient, FakeAsyncEmbeddingsClient, make_pdf  # noqa: E402
+
+
+async def main(args):
+    embed_client = FakeAsyncEmbeddingsClient(latency=args.embed_latency)
+    rag_pipeline.embeddings.async_client = embed_client
+    rag_pipeline.chat_client = FakeAsyncChatClient(latency=args.chat_latency, tokens=0, jitter=args.jitter)
+    import app as app_module
+
+    path = os.path.join(WORKDIR, "doc.pdf")
+    make_pdf(path, args.pages, seed=1)
+    os.chdir(WORKDIR)
+    questions = [f"what does clause {i} say about renewal?" for i in range(args.questions)]
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with (
+        app_module.lifespan(app_module.app),
+        httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client,
+    ):
+        with open(path, "rb") as f:
+            await upload_and_wait(client, "doc.pdf", f.read())
+
+        calls = embed_client.calls
+        start = time.perf_counter()
+        for q in questions[: args.sequential]:
+            (await client.post("/ask/", data={"question": q})).raise_for_status()
+        per_question = (time.perf_counter() - start) / args.sequential
+        sequential_calls = embed_client.calls - calls
+
+        calls = embed_client.calls
+        start = time.perf_counter()
+        # ASGITransport hands over the body only once it is complete, so this
+        # measures total time, not time to the first streamed answer.
+        response = await client.post("/ask/batch/", data={"questions": questions})
+        lines = [json.loads(line) for line in response.text.splitlines() if line]
+        batch_seconds = time.perf_counter() - start
+
+    summary = lines[-1]
+    result = {
+        "questions": args.questions,
+        "sequential_seconds_per_question": per_question,
+        "sequential_seconds_estimated": per_question * args.questions,
+        "sequential_embedding_calls_per_question": sequential_calls / args.sequential,
+        "batch_concurrency": app_module.BATCH_CONCURRENCY,
+        "batch_seconds": batch_seconds,
+        "batch_embedding_calls": embed_client.calls - calls,
+        "batch_errors": sum(1 for line in lines if "error" in line),
+        "batch_timings": summary["timings"],
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--sequential", type=int, default=10, help="sequential /ask/ calls to time")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    parser.add_argument("--chat-latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.5)
+    asyncio.run(main(parser.parse_args()))
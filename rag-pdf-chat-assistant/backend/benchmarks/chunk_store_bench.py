@@ -0,0 +1,113 @@
+"""Load time and memory of the columnar ChunkStore against a pickled InMemoryDocstore.
+
+    python benchmarks/chunk_store_bench.py --chunks 10000 100000 500000
+
+Chunks carry the metadata PyPDFLoader produces for a real PDF. Memory is
+what tracemalloc sees allocated by the load (mapped files are not counted;
+they live in the shared page cache).
+"""
+import argparse
+import json
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_community.docstore.in_memory import InMemoryDocstore  # noqa: E402
+from langchain_core.documents import Document  # noqa: E402
+
+from benchmarks.synthetic import WORDS  # noqa: E402
+from chunk_store import ChunkStore  # noqa: E402
+
+
+def make_chunks(n, chunks_per_doc=300, seed=0):
+    rnd = random.Random(seed)
+    chunks = {}
+    for i in range(n):
+        doc = i // chunks_per_doc
+        metadata = {
+            "producer": "pypdf", "creator": "Microsoft Word", "creationdate": "2024-03-01T10:00:00+00:00",
+            "source": f"temp/{doc:08x}.pdf", "total_pages": 120, "page": (i % chunks_per_doc) // 3,
+            "page_label": str((i % chunks_per_doc) // 3 + 1), "start_index": (i % 3) * 450, "doc_id": f"{doc:08x}",
+        }
+        text = " ".join(rnd.choice(WORDS) for _ in range(70))
+        chunks[f"{doc:08x}:{i % chunks_per_doc}"] = Document(page_content=text, metadata=metadata)
+    return chunks
+
+
+def measure(load):
+    # Timed without tracemalloc, which slows allocation-heavy loads a lot.
+    start = time.perf_counter()
+    store = load()
+    seconds = time.perf_counter() - start
+    del store
+    tracemalloc.start()
+    store = load()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return store, seconds, allocated
+
+
+def hydrate_us(store, ids, k=12, rounds=200):
+    rnd = random.Random(1)
+    store.search(ids[0])  # the first lookup after a load builds the id map
+    start = time.perf_counter()
+    for _ in range(rounds):
+        [store.search(i) for i in rnd.sample(ids, k)]
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main(args):
+    rows = []
+    for n in args.chunks:
+        workdir = tempfile.mkdtemp(prefix="rag-chunk-store-")
+        chunks = make_chunks(n)
+        ids = list(chunks)
+
+        with open(os.path.join(workdir, "docstore.pkl"), "wb") as f:
+            pickle.dump(InMemoryDocstore(chunks), f)
+        store = ChunkStore()
+        store.add(chunks)
+        store.save(workdir)
+        del chunks, store
+
+        def load_pickle():
+            with open(os.path.join(workdir, "docstore.pkl"), "rb") as f:
+                return pickle.load(f)
+
+        for name, load in [
+            ("pickled InMemoryDocstore", load_pickle),
+            ("ChunkStore", lambda: ChunkStore.load(workdir)),
+            ("ChunkStore (mmap)", lambda: ChunkStore.load(workdir, mmap_files=True)),
+        ]:
+            store, seconds, allocated = measure(load)
+            rows.append({
+                "chunks": n,
+                "store": name,
+                "load_ms": round(seconds * 1000, 1),
+                "allocated_mb": round(allocated / 2**20, 1),
+                "hydrate_top12_us": round(hydrate_us(store, ids), 1),
+            })
+            del store
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{'chunks':>8}  {'store':<26}{'load ms':>9}{'alloc MB':>10}{'top-12 us':>11}")
+    for r in rows:
+        print(
+            f"{r['chunks']:>8}  {r['store']:<26}{r['load_ms']:>9.1f}{r['allocated_mb']:>10.1f}"
+            f"{r['hydrate_top12_us']:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    main(parser.parse_args())
@@ -0,0 +1,98 @@
+"""Check that a long ingestion does not raise /ask/ latency for other clients.
+
+Runs the FastAPI app in-process against fake model clients, measures /ask/
+latency on an idle server, then again while a large PDF is being uploaded.
+
+    python benchmarks/concurrency_check.py --pages 400 --asks 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+WORKDIR = tempfile.mkdtemp(prefix="rag-bench-")
+os.environ.setdefault("GITHUB_EMBEDDING_TOKEN", "offline")
+os.environ.setdefault("GITHUB_CHAT_TOKEN", "offline")
+os.environ["INDEX_CACHE_DIR"] = os.path.join(WORKDIR, "index_cache")
+os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(WORKDIR, "embeddings.sqlite3")
+os.environ["SESSION_DIR"] = os.path.join(WORKDIR, "sessions")
+os.environ["JOB_STATUS_DIR"] = os.path.join(WORKDIR, "jobs")
+os.environ["UPLOAD_DIR"] = os.path.join(WORKDIR, "uploads")
+# Both phases ask the same questions; cached answers would hide the ingest load.
+os.environ["ANSWER_CACHE_THRESHOLD"] = "1.01"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+import rag_pipeline  # noqa: E402
+from benchmarks.synthetic import FakeAsyncChatClient, FakeAsyncEmbeddingsClient, make_pdf  # noqa: E402
+
+
+async def timed_ask(client, question):
+    start = time.perf_counter()
+    response = await client.post("/ask/", data={"question": question})
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def ask_series(client, n):
+    return [await timed_ask(client, f"what is the renewal term {i}?") for i in range(n)]
+
+
+async def upload_and_wait(client, name, payload):
+    response = await client.post("/upload/", files={"file": (name, payload)})
+    response.raise_for_status()
+    job_id = response.json()["job_id"]
+    while True:
+        job = (await client.get(f"/jobs/{job_id}")).json()
+        if job["status"] in ("done", "failed"):
+            return job
+        await asyncio.sleep(0.05)
+
+
+def summary(latencies):
+    return f"p50={statistics.median(latencies) * 1000:.0f}ms max={max(latencies) * 1000:.0f}ms"
+
+
+async def main(args):
+    rag_pipeline.embeddings.async_client = FakeAsyncEmbeddingsClient(latency=args.embed_latency)
+    rag_pipeline.chat_client = FakeAsyncChatClient(latency=args.chat_latency)
+    import app as app_module
+
+    small, large = os.path.join(WORKDIR, "small.pdf"), os.path.join(WORKDIR, "large.pdf")
+    make_pdf(small, 3, seed=1)
+    make_pdf(large, args.pages, seed=2)
+    os.chdir(WORKDIR)
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with (
+        app_module.lifespan(app_module.app),
+        httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client,
+    ):
+        with open(small, "rb") as f:
+            await upload_and_wait(client, "small.pdf", f.read())
+
+        idle = await ask_series(client, args.asks)
+        print(f"/ask/ idle:            {summary(idle)}")
+
+        with open(large, "rb") as f:
+            payload = f.read()
+        upload_start = time.perf_counter()
+        upload = asyncio.create_task(upload_and_wait(client, "large.pdf", payload))
+        await asyncio.sleep(0.05)
+        busy = await ask_series(client, args.asks)
+        job = await upload
+        print(f"/ask/ during ingest:   {summary(busy)}")
+        print(f"ingest of {args.pages} pages: {time.perf_counter() - upload_start:.2f}s ({job['status']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--asks", type=int, default=20)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    parser.add_argument("--chat-latency", type=float, default=0.05)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,56 @@
+"""Check what ChunkDeduplicator collapses and what it must keep.
+
+Repeated boilerplate (including headers and footers that differ only in
+"Page N of M") should be reduced to one chunk. Spec or table rows that
+differ only in their numbers are different content and must all be kept,
+since exact-match retrieval of part numbers depends on them.
+
+    python benchmarks/dedup_check.py
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document  # noqa: E402
+
+from chunk_dedup import ChunkDeduplicator  # noqa: E402
+
+BOILERPLATE = (
+    "Confidential. This document is provided for the exclusive use of the recipient and may not be "
+    "copied or distributed without prior written consent of the publisher. All rights reserved. "
+)
+ROW = (
+    "Model {part} industrial power supply, input voltage {volts} V AC, output 24 V DC, operating "
+    "temperature range minus twenty to plus sixty degrees, DIN rail mount, list price {price} USD"
+)
+
+
+def kept(threshold, texts):
+    dedup = ChunkDeduplicator(threshold)
+    chunks = [Document(page_content=text, metadata={"page": page}) for page, text in enumerate(texts)]
+    return [chunk.page_content for chunk in dedup.filter(chunks)]
+
+
+def main():
+    rows = [
+        ROW.format(part="AB-1234", volts=120, price=199),
+        ROW.format(part="AB-5678", volts=240, price=849),
+        ROW.format(part="AB-1234", volts=120, price=199),
+    ]
+    footers = [f"{BOILERPLATE}Page {n} of 40" for n in range(1, 6)]
+    result = {}
+    for threshold in (0.8, 0.9):
+        result[threshold] = {
+            "spec_rows_kept": len(kept(threshold, rows)),
+            "footers_kept": len(kept(threshold, footers)),
+        }
+    print(json.dumps(result, indent=2))
+    ok = all(r["spec_rows_kept"] == 2 and r["footers_kept"] == 1 for r in result.values())
+    if not ok:
+        sys.exit("expected 2 distinct spec rows and 1 footer to be kept")
+
+
+if __name__ == "__main__":
+    main()
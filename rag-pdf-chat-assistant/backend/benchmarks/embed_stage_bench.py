@@ -0,0 +1,112 @@
+"""Throughput of the ingestion embed stage at different embed_concurrency settings.
+
+Feeds --groups groups of --group-size chunks through
+IngestionPipeline._embed against a fake embeddings client with the given
+latency and jitter, with the embedding cache off. Reports wall time, the
+peak number of embed calls in flight, and checks that the groups came out
+in the order they went in, with the right vectors.
+
+    python benchmarks/embed_stage_bench.py --groups 50 --concurrency 1 4 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+WORKDIR = tempfile.mkdtemp(prefix="rag-embed-bench-")
+os.environ.setdefault("GITHUB_EMBEDDING_TOKEN", "offline")
+os.environ.setdefault("GITHUB_CHAT_TOKEN", "offline")
+os.environ["INDEX_CACHE_DIR"] = os.path.join(WORKDIR, "index_cache")
+os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(WORKDIR, "embeddings.sqlite3")
+os.environ["SESSION_DIR"] = os.path.join(WORKDIR, "sessions")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document  # noqa: E402
+
+import rag_pipeline  # noqa: E402
+from benchmarks.synthetic import FakeAsyncEmbeddingsClient, fake_vector  # noqa: E402
+from ingestion import _DONE, IngestJob, IngestionPipeline  # noqa: E402
+
+
+class CountingEmbeddingsClient(FakeAsyncEmbeddingsClient):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def embed(self, input, model=None, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            return await super().embed(input, model, **kwargs)
+        finally:
+            self.in_flight -= 1
+
+
+async def run(args, concurrency: int) -> dict:
+    client = CountingEmbeddingsClient(dim=args.dim, latency=args.latency, jitter=args.jitter)
+    rag_pipeline.embeddings.async_client = client
+    rag_pipeline.embeddings.cache = None
+    pipeline = IngestionPipeline(None, None, None, embed_concurrency=concurrency)
+    job = IngestJob(doc_id="bench", filename="bench.pdf", path="", key="")
+    groups = [
+        [Document(page_content=f"chunk {g}-{i} of the benchmark document") for i in range(args.group_size)]
+        for g in range(args.groups)
+    ]
+    inp, out = asyncio.Queue(4), asyncio.Queue(4)
+    received = []
+
+    async def feed():
+        for group in groups:
+            await inp.put(group)
+        await inp.put(_DONE)
+
+    async def drain():
+        while (item := await out.get()) is not _DONE:
+            received.append(item)
+
+    start = time.perf_counter()
+    await asyncio.gather(feed(), pipeline._embed(job, inp, out), drain())
+    seconds = time.perf_counter() - start
+
+    in_order = [chunks for chunks, _ in received] == groups and all(
+        vectors[0] == fake_vector(chunks[0].page_content, args.dim) for chunks, vectors in received
+    )
+    return {
+        "embed_concurrency": concurrency,
+        "seconds": round(seconds, 3),
+        "calls": client.calls,
+        "peak_in_flight": client.peak,
+        "chunks_embedded": job.chunks_embedded,
+        "in_order": in_order,
+    }
+
+
+def main(args):
+    results = [asyncio.run(run(args, c)) for c in args.concurrency]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{args.groups} groups x {args.group_size} chunks, latency {args.latency * 1000:.0f}ms "
+              f"+ up to {args.jitter * 1000:.0f}ms jitter")
+        print(f"{'concurrency':>12}{'seconds':>9}{'calls':>7}{'peak':>6}{'in order':>10}")
+        for r in results:
+            print(f"{r['embed_concurrency']:>12}{r['seconds']:>9.2f}{r['calls']:>7}{r['peak_in_flight']:>6}"
+                  f"{str(r['in_order']):>10}")
+    if not all(r["in_order"] for r in results):
+        sys.exit("embed stage reordered or mismatched chunk groups")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, default=50)
+    parser.add_argument("--group-size", type=int, default=64, help="chunks per group, as IngestionPipeline.embed_batch")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    main(parser.parse_args())
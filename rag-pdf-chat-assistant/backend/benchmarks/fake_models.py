@@ -0,0 +1,106 @@
+"""Local HTTP stand-in for the GitHub Models embeddings and chat endpoints.
+
+Speaks enough of the Azure AI Inference wire format for rag_pipeline's
+clients, with a configurable delay per request, so the backend can be
+benchmarked end to end without network access or tokens:
+
+    python benchmarks/fake_models.py --port 8001 --embed-latency 0.05 --chat-latency 0.3
+    GITHUB_MODELS_ENDPOINT=http://127.0.0.1:8001 uvicorn app:app
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uvicorn  # noqa: E402
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.responses import StreamingResponse  # noqa: E402
+
+from benchmarks.synthetic import fake_vector  # noqa: E402
+
+
+def create_app(
+    dim=256, embed_latency=0.05, chat_latency=0.3, token_latency=0.01, tokens=20, jitter=0.0
+) -> FastAPI:
+    app = FastAPI()
+    counters = {"embedding_requests": 0, "embedding_inputs": 0, "chat_requests": 0}
+
+    async def delay(seconds):
+        await asyncio.sleep(seconds + random.uniform(0, jitter))
+
+    @app.post("/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        texts = body["input"]
+        counters["embedding_requests"] += 1
+        counters["embedding_inputs"] += len(texts)
+        await delay(embed_latency)
+        return {
+            "id": uuid.uuid4().hex,
+            "model": body.get("model", "fake"),
+            "data": [{"index": i, "embedding": fake_vector(t, dim)} for i, t in enumerate(texts)],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        }
+
+    @app.post("/chat/completions")
+    async def chat(request: Request):
+        body = await request.json()
+        counters["chat_requests"] += 1
+        model = body.get("model", "fake")
+        words = [f"tok{i} " for i in range(tokens)]
+        await delay(chat_latency)
+        if not body.get("stream"):
+            await asyncio.sleep(token_latency * tokens)
+            return {
+                "id": uuid.uuid4().hex,
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": "".join(words)},
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": tokens, "total_tokens": tokens},
+            }
+
+        async def events():
+            completion_id = uuid.uuid4().hex
+            for word in words:
+                await asyncio.sleep(token_latency)
+                chunk = {
+                    "id": completion_id,
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"role": "assistant", "content": word}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return counters
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--dim", type=int, default=256, help="embedding dimension")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="seconds per embeddings request")
+    parser.add_argument("--chat-latency", type=float, default=0.3, help="seconds to the first answer token")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="seconds per answer token")
+    parser.add_argument("--tokens", type=int, default=20, help="answer length in tokens")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra uniform random delay, up to this many seconds")
+    args = parser.parse_args()
+    app = create_app(args.dim, args.embed_latency, args.chat_latency, args.token_latency, args.tokens, args.jitter)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,136 @@
+"""Compare FAISS index settings against exact search: recall@k, latency, bytes/vector.
+
+Vectors come from a saved index directory (e.g. an entry under index_cache/)
+or are generated as a synthetic clustered set:
+
+    python benchmarks/index_eval.py --index-dir index_cache/<key>
+    python benchmarks/index_eval.py --n 200000 --dim 3072 --types hnsw ivf_pq fp16
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import faiss  # noqa: E402
+import numpy as np  # noqa: E402
+
+from index_factory import INDEX_TYPES, IndexConfig, build_index, index_bytes, reconstruct_all  # noqa: E402
+
+
+def synthetic_vectors(n, dim, clusters=256, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + 0.3 * rng.standard_normal((n, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def load_vectors(index_dir):
+    return reconstruct_all(faiss.read_index(os.path.join(index_dir, "index.faiss"))).astype(np.float32)
+
+
+def make_queries(vectors, n, seed=1):
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.choice(len(vectors), size=n, replace=len(vectors) < n)]
+    queries = picks + 0.05 * rng.standard_normal(picks.shape).astype(np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def search_latencies(index, queries, k):
+    # One query at a time, as /ask/ issues them.
+    latencies, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        _, ids = index.search(q[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        results.append(ids[0])
+    return np.array(results), latencies
+
+
+def recall_at_k(found, truth):
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def evaluate(index, name, params, queries, truth, k, n, build_seconds):
+    found, latencies = search_latencies(index, queries, k)
+    latencies.sort()
+    return {
+        "index": name,
+        "params": params,
+        "recall_at_k": recall_at_k(found, truth),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[math.ceil(0.99 * len(latencies)) - 1] * 1000,
+        "bytes_per_vector": index_bytes(index) / n,
+        "build_seconds": build_seconds,
+    }
+
+
+def main(args):
+    vectors = load_vectors(args.index_dir) if args.index_dir else synthetic_vectors(args.n, args.dim)
+    n, dim = vectors.shape
+    queries = make_queries(vectors, args.queries)
+
+    start = time.perf_counter()
+    exact = build_index(IndexConfig(index_type="flat"), dim)
+    exact.add(vectors)
+    exact_build = time.perf_counter() - start
+    _, truth = exact.search(queries, args.k)
+    rows = [evaluate(exact, "flat", {}, queries, truth, args.k, n, exact_build)]
+
+    for index_type in args.types:
+        config = IndexConfig(index_type=index_type, hnsw_m=args.hnsw_m, pq_m=args.pq_m, nlist=args.nlist)
+        start = time.perf_counter()
+        index = build_index(config, dim, vectors[: args.train_size] if config.needs_training else None)
+        index.add(vectors)
+        build_seconds = time.perf_counter() - start
+
+        if index_type == "hnsw":
+            sweeps = [("efSearch", v) for v in args.ef_search]
+        elif index_type.startswith("ivf"):
+            sweeps = [("nprobe", v) for v in args.nprobe]
+        else:
+            sweeps = [(None, None)]
+        for param, value in sweeps:
+            if param == "efSearch":
+                index.hnsw.efSearch = value
+            elif param == "nprobe":
+                faiss.extract_index_ivf(index).nprobe = value
+            params = {param: value} if param else {}
+            rows.append(evaluate(index, index_type, params, queries, truth, args.k, n, build_seconds))
+
+    if args.json:
+        print(json.dumps({"n": n, "dim": dim, "k": args.k, "results": rows}, indent=2))
+        return
+    print(f"n={n} dim={dim} k={args.k} queries={len(queries)}")
+    print(f"{'index':<10}{'params':<18}{'recall@k':>10}{'p50 ms':>9}{'p99 ms':>9}{'B/vec':>9}{'build s':>9}")
+    for r in rows:
+        params = ",".join(f"{k}={v}" for k, v in r["params"].items())
+        print(
+            f"{r['index']:<10}{params:<18}{r['recall_at_k']:>10.3f}{r['p50_ms']:>9.3f}"
+            f"{r['p99_ms']:>9.3f}{r['bytes_per_vector']:>9.0f}{r['build_seconds']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--index-dir", help="directory containing index.faiss")
+    parser.add_argument("--n", type=int, default=50000, help="synthetic vector count")
+    parser.add_argument("--dim", type=int, default=256, help="synthetic vector dimension")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--types", nargs="+", default=[t for t in INDEX_TYPES if t != "flat"], choices=INDEX_TYPES)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--pq-m", type=int, default=64)
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--train-size", type=int, default=100000)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    main(parser.parse_args())
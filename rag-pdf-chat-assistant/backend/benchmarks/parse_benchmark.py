@@ -0,0 +1,80 @@
+"""Measure PDF parsing throughput (pages/sec) against process-pool size.
+
+    python benchmarks/parse_benchmark.py --pages 2000 --workers 1 2 4 8
+
+The baseline row is the original single-threaded PyPDFLoader(...).load().
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter  # noqa: E402
+from langchain_community.document_loaders import PyPDFLoader  # noqa: E402
+
+from benchmarks.synthetic import make_pdf  # noqa: E402
+from pdf_parsing import iter_chunks  # noqa: E402
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_baseline(path, splitter):
+    start = time.perf_counter()
+    pages = PyPDFLoader(path).load()
+    chunks = splitter.split_documents(pages)
+    return len(pages), len(chunks), time.perf_counter() - start
+
+
+def run_parallel(path, splitter, workers, pages_per_task):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pool.submit(int).result()  # start the workers outside the timed region
+        start = time.perf_counter()
+        pages, chunks = set(), 0
+        for chunk in iter_chunks(path, pool, splitter, pages_per_task, window=2 * workers):
+            pages.add(chunk.metadata["page"])
+            chunks += 1
+        return len(pages), chunks, time.perf_counter() - start
+
+
+def main(args):
+    path = os.path.join(tempfile.mkdtemp(prefix="rag-parse-"), "bench.pdf")
+    make_pdf(path, args.pages)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
+
+    results = []
+    pages, chunks, seconds = run_baseline(path, splitter)
+    results.append({"mode": "baseline", "workers": 1, "pages": pages, "chunks": chunks, "seconds": seconds})
+    for workers in args.workers:
+        pages, chunks, seconds = run_parallel(path, splitter, workers, args.pages_per_task)
+        results.append({"mode": "parallel", "workers": workers, "pages": pages, "chunks": chunks, "seconds": seconds})
+
+    for r in results:
+        r["pages_per_sec"] = r["pages"] / r["seconds"]
+    if args.json:
+        print(json.dumps({"results": results, "parent_peak_rss_mb": peak_rss_mb()}, indent=2))
+        return
+    print(f"{'mode':<10}{'workers':>8}{'pages':>8}{'chunks':>8}{'seconds':>10}{'pages/s':>10}")
+    for r in results:
+        print(
+            f"{r['mode']:<10}{r['workers']:>8}{r['pages']:>8}{r['chunks']:>8}"
+            f"{r['seconds']:>10.2f}{r['pages_per_sec']:>10.1f}"
+        )
+    print(f"parent peak RSS: {peak_rss_mb():.0f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--pages-per-task", type=int, default=8)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    main(parser.parse_args())
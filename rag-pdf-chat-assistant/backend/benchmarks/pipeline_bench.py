@@ -0,0 +1,239 @@
+"""End-to-end benchmark of the backend against local model stand-ins.
+
+Starts benchmarks/fake_models.py and the API under uvicorn as separate
+processes (the API pointed at the fakes through GITHUB_MODELS_ENDPOINT),
+uploads synthetic PDFs of the given page counts, then drives /ask/ at each
+concurrency level. Reports ingestion throughput, /ask/ latency percentiles
+and the API server's peak RSS; --output writes the same numbers as JSON for
+tracking regressions.
+
+    python benchmarks/pipeline_bench.py --pages 10 100 500 --concurrency 1 8 32 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+import httpx  # noqa: E402
+
+from benchmarks.synthetic import make_pdf  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile_ms(sorted_seconds, q):
+    # Nearest rank, as in the other benchmarks
+    return round(sorted_seconds[math.ceil(q * len(sorted_seconds)) - 1] * 1000, 2)
+
+
+def process_tree(pid: int) -> list[int]:
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(c) for c in f.read().split()]
+    except OSError:
+        return pids
+    for child in children:
+        pids.extend(process_tree(child))
+    return pids
+
+
+def peak_rss_mb(pid: int) -> float | None:
+    """Peak RSS (VmHWM) of a process and its children, summed; None off Linux.
+
+    With several uvicorn workers the peaks need not coincide, so the sum is
+    an upper bound.
+    """
+    total = 0
+    for p in process_tree(pid):
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        total += int(line.split()[1])
+        except OSError:
+            if p == pid:
+                return None
+    return round(total / 1024, 1)
+
+
+async def wait_ready(url: str, proc: subprocess.Popen, timeout: float = 60) -> float:
+    start = time.perf_counter()
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{proc.args} exited with {proc.returncode}")
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+
+async def ingest(client, path: str) -> dict:
+    with open(path, "rb") as f:
+        response = await client.post("/upload/", files={"file": (os.path.basename(path), f.read())})
+    response.raise_for_status()
+    job_id = response.json()["job_id"]
+    while True:
+        job = (await client.get(f"/jobs/{job_id}")).json()
+        if job["status"] in ("done", "failed"):
+            break
+        await asyncio.sleep(0.05)
+    if job["status"] == "failed":
+        raise RuntimeError(f"ingesting {path} failed: {job['error']}")
+    seconds = job["finished_at"] - job["created_at"]
+    return {
+        "pages": job["total_pages"],
+        "chunks": job["chunks_split"],
+        "chunks_indexed": job["chunks_indexed"],
+        "seconds": round(seconds, 3),
+        "pages_per_sec": round(job["total_pages"] / seconds, 1),
+        "chunks_per_sec": round(job["chunks_split"] / seconds, 1),
+    }
+
+
+async def ask_load(client, concurrency: int, total: int, offset: int) -> dict:
+    # Every question is distinct so the semantic answer cache stays out of the way.
+    questions = iter(range(offset, offset + total))
+    latencies, errors = [], 0
+
+    async def worker():
+        nonlocal errors
+        for i in questions:
+            start = time.perf_counter()
+            response = await client.post("/ask/", data={"question": f"what does clause {i} say about renewal?"})
+            if response.status_code != 200 or "error" in response.json():
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "requests_per_sec": round(len(latencies) / wall, 1),
+        "p50_ms": percentile_ms(latencies, 0.5) if latencies else None,
+        "p95_ms": percentile_ms(latencies, 0.95) if latencies else None,
+        "p99_ms": percentile_ms(latencies, 0.99) if latencies else None,
+    }
+
+
+async def run(args, workdir: str) -> dict:
+    models_port, api_port = free_port(), free_port()
+    models = subprocess.Popen([
+        sys.executable, os.path.join(BACKEND, "benchmarks", "fake_models.py"), "--port", str(models_port),
+        "--dim", str(args.dim), "--embed-latency", str(args.embed_latency), "--chat-latency", str(args.chat_latency),
+        "--token-latency", str(args.token_latency), "--jitter", str(args.jitter),
+    ])
+    env = {
+        **os.environ,
+        "GITHUB_MODELS_ENDPOINT": f"http://127.0.0.1:{models_port}",
+        "GITHUB_EMBEDDING_TOKEN": "offline",
+        "GITHUB_CHAT_TOKEN": "offline",
+        "INDEX_CACHE_DIR": os.path.join(workdir, "index_cache"),
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embeddings.sqlite3"),
+        "SESSION_DIR": os.path.join(workdir, "sessions"),
+        "JOB_STATUS_DIR": os.path.join(workdir, "jobs"),
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        "ANSWER_CACHE_THRESHOLD": "1.01",
+    }
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(api_port), "--workers", str(args.workers),
+         "--log-level", "warning"],
+        cwd=BACKEND,
+        env=env,
+    )
+    try:
+        await wait_ready(f"http://127.0.0.1:{models_port}/stats", models)
+        startup = await wait_ready(f"http://127.0.0.1:{api_port}/stats/", api)
+        rss = {"startup": peak_rss_mb(api.pid)}
+
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{api_port}", timeout=None) as client:
+            ingestion = []
+            for seed, pages in enumerate(args.pages):
+                path = os.path.join(workdir, f"bench-{pages}.pdf")
+                make_pdf(path, pages, seed=seed)
+                ingestion.append(await ingest(client, path))
+            rss["after_ingest"] = peak_rss_mb(api.pid)
+
+            asks = []
+            for level in args.concurrency:
+                asks.append(await ask_load(client, level, args.asks, offset=len(asks) * args.asks))
+            rss["after_ask"] = peak_rss_mb(api.pid)
+
+        async with httpx.AsyncClient() as client:
+            model_calls = (await client.get(f"http://127.0.0.1:{models_port}/stats")).json()
+    finally:
+        for proc in (api, models):
+            proc.terminate()
+            proc.wait()
+
+    total_seconds = sum(r["seconds"] for r in ingestion)
+    return {
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "python": platform.python_version(),
+        "startup_seconds": round(startup, 3),
+        "ingest": ingestion,
+        "ingest_total": {
+            "pages_per_sec": round(sum(r["pages"] for r in ingestion) / total_seconds, 1),
+            "chunks_per_sec": round(sum(r["chunks"] for r in ingestion) / total_seconds, 1),
+        },
+        "ask": asks,
+        "peak_rss_mb": rss,
+        "model_calls": model_calls,
+    }
+
+
+def main(args):
+    with tempfile.TemporaryDirectory(prefix="rag-pipeline-bench-") as workdir:
+        results = asyncio.run(run(args, workdir))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    print(f"startup {results['startup_seconds']:.2f}s, peak RSS (MB): {results['peak_rss_mb']}")
+    print(f"{'pages':>7}{'chunks':>8}{'seconds':>9}{'pages/s':>9}{'chunks/s':>10}")
+    for r in results["ingest"]:
+        print(f"{r['pages']:>7}{r['chunks']:>8}{r['seconds']:>9.2f}{r['pages_per_sec']:>9.1f}{r['chunks_per_sec']:>10.1f}")
+    print(f"{'concurrency':>12}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for r in results["ask"]:
+        print(
+            f"{r['concurrency']:>12}{r['requests_per_sec']:>8.1f}{r['p50_ms']:>9}{r['p95_ms']:>9}"
+            f"{r['p99_ms']:>9}{r['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100], help="page count of each synthetic PDF")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="concurrent /ask/ clients")
+    parser.add_argument("--asks", type=int, default=100, help="/ask/ requests per concurrency level")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the API")
+    parser.add_argument("--dim", type=int, default=256, help="fake embedding dimension")
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    parser.add_argument("--chat-latency", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.01)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    main(parser.parse_args())
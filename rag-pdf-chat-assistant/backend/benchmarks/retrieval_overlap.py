@@ -0,0 +1,101 @@
+"""Whether hybrid retrieval's vector and BM25 searches overlap in time.
+
+get_top_k_docs_many runs both retrievers with asyncio.gather over
+to_thread. FAISS releases the GIL while it searches, so on a read-only
+snapshot (which skips the corpus lock) the two should take about as long
+as the slower one; under the lock they take the sum. The overlap needs a
+second core, so the CPU count is printed with the results.
+
+    python benchmarks/retrieval_overlap.py --chunks 100000 --dim 1536
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+from langchain_core.documents import Document  # noqa: E402
+
+from benchmarks.synthetic import WORDS  # noqa: E402
+from corpus import Corpus  # noqa: E402
+from index_factory import IndexConfig  # noqa: E402
+
+
+def build(chunks: int, dim: int, workdir: str) -> None:
+    rnd = random.Random(0)
+    rng = np.random.default_rng(0)
+    corpus = Corpus(None, IndexConfig())
+    per_doc = 1000
+    for d in range(0, chunks, per_doc):
+        n = min(per_doc, chunks - d)
+        docs = [
+            Document(page_content=" ".join(rnd.choice(WORDS) for _ in range(60)), metadata={"page": i})
+            for i in range(n)
+        ]
+        vectors = rng.standard_normal((n, dim), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        corpus.add_document(f"doc{d // per_doc}", docs, vectors)
+    corpus.save(workdir)
+
+
+def timed(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main(args):
+    workdir = tempfile.mkdtemp(prefix="rag-overlap-")
+    build(args.chunks, args.dim, workdir)
+    corpus = Corpus.load(workdir, None, IndexConfig(), mmap=True)
+    rng = np.random.default_rng(1)
+    query_vectors = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    queries = [" ".join(random.Random(i).choice(WORDS) for _ in range(8)) for i in range(args.queries)]
+    fetch = 4 * 4
+
+    def vector():
+        corpus.vector_candidates_many(query_vectors, fetch)
+
+    def lexical():
+        [corpus.lexical_candidates(q, fetch) for q in queries]
+
+    async def both():
+        await asyncio.gather(asyncio.to_thread(vector), asyncio.to_thread(lexical))
+
+    vector_ms = timed(vector, args.rounds)
+    lexical_ms = timed(lexical, args.rounds)
+    rows = {"cpus": os.cpu_count(), "chunks": args.chunks, "dim": args.dim, "queries": args.queries,
+            "vector_ms": round(vector_ms, 1), "lexical_ms": round(lexical_ms, 1)}
+    for name, read_only in [("locked_ms", False), ("read_only_ms", True)]:
+        corpus.read_only = read_only
+        rows[name] = round(timed(lambda: asyncio.run(both()), args.rounds), 1)
+    corpus.read_only = True
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{args.chunks} chunks x {args.dim} dims, {args.queries} queries per batch, median of {args.rounds}, {rows['cpus']} cpus")
+    print(f"  vector search alone        {rows['vector_ms']:>8.1f} ms")
+    print(f"  BM25 search alone          {rows['lexical_ms']:>8.1f} ms")
+    print(f"  both, corpus lock held     {rows['locked_ms']:>8.1f} ms")
+    print(f"  both, read-only snapshot   {rows['read_only_ms']:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=1, help="queries per retrieval batch")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    main(parser.parse_args())
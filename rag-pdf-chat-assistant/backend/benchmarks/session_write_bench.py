@@ -0,0 +1,109 @@
+"""Cost of one SessionRegistry write as the session's corpus grows.
+
+Every write loads the session's snapshot into private memory and publishes
+a complete new one, so adding a small document costs time, disk writes and
+memory in proportion to what the session already holds. For each session
+size this adds one --doc-chunks document and reports the time, the bytes
+written for the new snapshot and the writer's private copy; the last row
+checks that max_session_bytes rejects a write past the limit.
+
+    python benchmarks/session_write_bench.py --chunks 1000 10000 50000 --dim 1536
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+from langchain_core.documents import Document  # noqa: E402
+
+from benchmarks.synthetic import WORDS  # noqa: E402
+from index_factory import IndexConfig  # noqa: E402
+from session_registry import SessionRegistry, SessionTooLarge, version_dir  # noqa: E402
+
+
+def document(n: int, dim: int, seed: int):
+    rnd = random.Random(seed)
+    docs = [Document(page_content=" ".join(rnd.choice(WORDS) for _ in range(60)), metadata={"page": i}) for i in range(n)]
+    vectors = np.random.default_rng(seed).standard_normal((n, dim), dtype=np.float32)
+    return docs, vectors
+
+
+def dir_bytes(path) -> int:
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+
+async def add(registry, session_id, doc_id, docs, vectors):
+    async with registry.write(session_id) as corpus:
+        await asyncio.to_thread(corpus.add_document, doc_id, docs, vectors)
+        return corpus.memory_bytes()
+
+
+async def measure(args, chunks: int, workdir: str) -> dict:
+    registry = SessionRegistry(None, IndexConfig(), workdir, max_bytes=1 << 40)
+    per_doc = 5000
+    for start in range(0, chunks, per_doc):
+        await add(registry, "s", f"base{start}", *document(min(per_doc, chunks - start), args.dim, start))
+    new_doc = document(args.doc_chunks, args.dim, seed=10**6)
+    start = time.perf_counter()
+    private = await add(registry, "s", "new", *new_doc)
+    seconds = time.perf_counter() - start
+    written = dir_bytes(os.path.join(workdir, "s", version_dir(registry.published_version("s"))))
+    return {
+        "session_chunks": chunks,
+        "write_seconds": round(seconds, 3),
+        "snapshot_mb_written": round(written / 2**20, 1),
+        "writer_copy_mb": round(private / 2**20, 1),
+    }
+
+
+async def check_limit(args, workdir: str) -> bool:
+    registry = SessionRegistry(None, IndexConfig(), workdir, max_bytes=1 << 40, max_session_bytes=1)
+    try:
+        await add(registry, "s", "doc", *document(args.doc_chunks, args.dim, 0))
+    except SessionTooLarge:
+        return registry.published_version("s") is None and not registry.writing
+    return False
+
+
+def main(args):
+    rows = []
+    for chunks in args.chunks:
+        workdir = tempfile.mkdtemp(prefix="rag-session-bench-")
+        try:
+            rows.append(asyncio.run(measure(args, chunks, workdir)))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    workdir = tempfile.mkdtemp(prefix="rag-session-bench-")
+    try:
+        limit_ok = asyncio.run(check_limit(args, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps({"writes": rows, "limit_rejects_growth": limit_ok}, indent=2))
+    else:
+        print(f"adding one {args.doc_chunks}-chunk document, {args.dim} dims")
+        print(f"{'session chunks':>15}{'seconds':>9}{'MB written':>12}{'writer MB':>11}")
+        for r in rows:
+            print(f"{r['session_chunks']:>15}{r['write_seconds']:>9.3f}{r['snapshot_mb_written']:>12.1f}"
+                  f"{r['writer_copy_mb']:>11.1f}")
+        print(f"max_session_bytes rejects growth: {limit_ok}")
+    if not limit_ok:
+        sys.exit("a write past max_session_bytes was published")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, nargs="+", default=[1000, 10000, 50000], help="chunks already in the session")
+    parser.add_argument("--doc-chunks", type=int, default=100, help="chunks in the document added")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    main(parser.parse_args())
@@ -0,0 +1,112 @@
+"""Synthetic PDFs and in-process stand-ins for the GitHub Models clients."""
+import asyncio
+import hashlib
+import random
+from types import SimpleNamespace
+
+import numpy as np
+
+WORDS = (
+    "agreement clause party liability invoice payment term notice section appendix "
+    "warranty schedule delivery contract service fee period renewal breach remedy "
+    "confidential information obligation termination governing law amendment"
+).split()
+
+
+def make_pdf(path: str, pages: int, seed: int = 0, lines_per_page: int = 40) -> None:
+    """Write a text-only PDF with ``pages`` pages of pseudo-random sentences."""
+    rnd = random.Random(seed)
+    objects = {
+        1: "<< /Type /Catalog /Pages 2 0 R >>",
+        3: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    page_ids = []
+    for n in range(pages):
+        lines = [
+            " ".join(rnd.choice(WORDS) for _ in range(12)) + f" ref {n + 1}-{i + 1}."
+            for i in range(lines_per_page)
+        ]
+        stream = "BT /F1 9 Tf 36 806 Td 11 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+        page_id, content_id = 4 + 2 * n, 5 + 2 * n
+        page_ids.append(page_id)
+        objects[page_id] = (
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        )
+        objects[content_id] = f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream"
+    kids = " ".join(f"{i} 0 R" for i in page_ids)
+    objects[2] = f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for num in sorted(objects):
+        offsets[num] = len(out)
+        out += f"{num} 0 obj\n{objects[num]}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    size = max(objects) + 1
+    out += f"xref\n0 {size}\n0000000000 65535 f \n".encode()
+    for num in range(1, size):
+        out += f"{offsets[num]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def fake_vector(text: str, dim: int) -> list[float]:
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+    v = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return (v / np.linalg.norm(v)).tolist()
+
+
+class FakeAsyncEmbeddingsClient:
+    """Deterministic embeddings after a simulated network delay."""
+
+    def __init__(self, dim: int = 256, latency: float = 0.05, jitter: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+
+    async def embed(self, input, model=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+        return SimpleNamespace(data=[SimpleNamespace(embedding=fake_vector(t, self.dim)) for t in input])
+
+    async def close(self):
+        pass
+
+
+class FakeAsyncChatClient:
+    """Streams a canned answer token by token after a first-token delay."""
+
+    def __init__(self, latency: float = 0.2, token_latency: float = 0.01, tokens: int = 20, jitter: float = 0.0):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.tokens = tokens
+        self.jitter = jitter
+
+    async def complete(self, messages, stream=False, **kwargs):
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+        words = [f"tok{i} " for i in range(self.tokens)]
+        if not stream:
+            await asyncio.sleep(self.token_latency * self.tokens)
+            message = SimpleNamespace(content="".join(words))
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+        return FakeStream(words, self.token_latency)
+
+    async def close(self):
+        pass
+
+
+class FakeStream:
+    def __init__(self, words, token_latency):
+        self.words = words
+        self.token_latency = token_latency
+
+    async def __aiter__(self):
+        for word in self.words:
+            await asyncio.sleep(self.token_latency)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word))])
+
+    async def aclose(self):
+        pass
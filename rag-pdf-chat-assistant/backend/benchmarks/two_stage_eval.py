@@ -0,0 +1,138 @@
+"""Two-stage retrieval: recall@k and latency of shortened-vector search + full-vector rerank.
+
+Each row searches an index over the first --dims components (renormalized),
+fetches rerank_factor * k candidates and reranks them with full vectors read
+from a memory-mapped VectorFile, as Corpus does with INDEX_SEARCH_DIMS set.
+Ground truth is exact search over the full vectors.
+
+    python benchmarks/two_stage_eval.py --index-dir index_cache/<key>
+    python benchmarks/two_stage_eval.py --n 100000 --dim 3072 --dims 256 512 --rerank-factor 1 4 10
+
+Real text-embedding-3 vectors concentrate information in their leading
+dimensions; the synthetic set imitates that with per-dimension scales that
+decay as (i + 1) ** -decay, so use --index-dir for numbers worth quoting.
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import faiss  # noqa: E402
+import numpy as np  # noqa: E402
+
+from benchmarks.index_eval import load_vectors, recall_at_k  # noqa: E402
+from index_factory import IndexConfig, build_index, index_bytes, reduce_dims  # noqa: E402
+from vector_file import VectorFile, rerank  # noqa: E402
+
+
+def synthetic_vectors(n, dim, decay, clusters=256, seed=0):
+    rng = np.random.default_rng(seed)
+    scales = ((np.arange(dim) + 1.0) ** -decay).astype(np.float32)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = (centers[rng.integers(0, clusters, n)] + 0.3 * rng.standard_normal((n, dim)).astype(np.float32)) * scales
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def make_queries(vectors, n, noise, seed=1):
+    # Perturb stored vectors by ``noise`` of their (unit) length.
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.choice(len(vectors), size=n, replace=len(vectors) < n)]
+    scale = np.float32(noise / np.sqrt(vectors.shape[1]))
+    queries = picks + scale * rng.standard_normal(picks.shape, dtype=np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def percentile_ms(latencies, q):
+    # Nearest rank, as in the other benchmarks
+    return latencies[math.ceil(q * len(latencies)) - 1] * 1000
+
+
+def run(search, queries, truth, k):
+    latencies, found = [], []
+    for q in queries:
+        start = time.perf_counter()
+        found.append(search(q, k))
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "recall_at_k": recall_at_k(np.array(found), truth),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile_ms(latencies, 0.99),
+    }
+
+
+def main(args):
+    vectors = load_vectors(args.index_dir) if args.index_dir else synthetic_vectors(args.n, args.dim, args.decay)
+    n, dim = vectors.shape
+    queries = make_queries(vectors, args.queries, args.noise)
+
+    exact = build_index(IndexConfig(index_type="flat"), dim)
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+    rows = [{
+        "index": "flat", "dims": dim, "rerank_factor": None,
+        **run(lambda q, k: exact.search(q[None, :], k)[1][0], queries, truth, args.k),
+        "index_bytes_per_vector": index_bytes(exact) / n,
+    }]
+
+    full = VectorFile(os.path.join(tempfile.mkdtemp(prefix="rag-two-stage-"), "full.f32"), dim)
+    full.put_many(list(range(n)), vectors)
+    del exact
+
+    for index_type in args.types:
+        for dims in args.dims:
+            config = IndexConfig(index_type=index_type, hnsw_m=args.hnsw_m, search_dims=dims)
+            reduced = reduce_dims(vectors, dims)
+            index = build_index(config, dims)
+            index.add(reduced)
+            per_vector = index_bytes(index) / n
+            for factor in args.rerank_factor:
+                def search(q, k, factor=factor):
+                    _, ids = index.search(reduce_dims(q, dims), k * factor)
+                    ids = ids[0][ids[0] >= 0]
+                    if factor == 1:
+                        return ids[:k]
+                    return ids[rerank(q, full.get_many(ids.tolist()), k)]
+
+                rows.append({
+                    "index": index_type, "dims": dims, "rerank_factor": factor,
+                    **run(search, queries, truth, args.k),
+                    "index_bytes_per_vector": per_vector,
+                })
+
+    if args.json:
+        print(json.dumps({"n": n, "dim": dim, "k": args.k, "results": rows}, indent=2))
+        return
+    print(f"n={n} dim={dim} k={args.k} queries={len(queries)} (rerank_factor 1 = no rerank)")
+    print(f"{'index':<8}{'dims':>6}{'rerank':>8}{'recall@k':>10}{'p50 ms':>9}{'p99 ms':>9}{'index B/vec':>13}")
+    for r in rows:
+        factor = "-" if r["rerank_factor"] is None else r["rerank_factor"]
+        print(
+            f"{r['index']:<8}{r['dims']:>6}{factor:>8}{r['recall_at_k']:>10.3f}{r['p50_ms']:>9.3f}"
+            f"{r['p99_ms']:>9.3f}{r['index_bytes_per_vector']:>13.0f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--index-dir", help="directory containing a full-dimension index.faiss")
+    parser.add_argument("--n", type=int, default=50000, help="synthetic vector count")
+    parser.add_argument("--dim", type=int, default=3072, help="synthetic vector dimension")
+    parser.add_argument("--decay", type=float, default=0.5, help="synthetic per-dimension scale decay")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.2, help="query perturbation, relative to vector length")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--dims", type=int, nargs="+", default=[256, 512])
+    parser.add_argument("--rerank-factor", type=int, nargs="+", default=[1, 4, 10])
+    parser.add_argument("--types", nargs="+", default=["flat", "hnsw"], choices=["flat", "hnsw", "fp16"])
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    main(parser.parse_args())
@@ -0,0 +1,104 @@
+import re
+import zlib
+
+import numpy as np
+from langchain_core.documents import Document
+
+MERSENNE_PRIME = (1 << 61) - 1
+WORD_RE = re.compile(r"\w+")
+NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+# Page furniture that differs between otherwise identical headers and footers.
+PAGE_NUMBER_RE = re.compile(r"\bpage\s+\d+(?:\s+of\s+\d+)?\b")
+
+
+def normalize(text: str) -> str:
+    return PAGE_NUMBER_RE.sub(" ", text.lower())
+
+
+def shingles(text: str, n: int = 3) -> set[str]:
+    words = WORD_RE.findall(normalize(text))
+    return {" ".join(words[i : i + n]) for i in range(max(1, len(words) - n + 1))}
+
+
+def numbers(text: str) -> tuple[str, ...]:
+    """The chunk's number tokens, which must match exactly for chunks to be duplicates."""
+    return tuple(sorted(NUMBER_RE.findall(normalize(text))))
+
+
+class ChunkDeduplicator:
+    """Collapses near-duplicate chunks of one document before they are embedded.
+
+    Each chunk gets a MinHash signature over its word 3-grams; LSH banding
+    finds earlier chunks that may be similar, and a chunk whose estimated
+    Jaccard similarity to one of them is >= ``threshold`` and whose number
+    tokens (part numbers, prices, ratings) are the same is dropped. The
+    kept copy remembers the pages its duplicates came from, which
+    ``annotate`` writes to its metadata as ``also_on_pages``.
+
+    ``filter`` can be called repeatedly as a document streams through, so
+    chunks are compared with every chunk kept so far.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.buckets: dict[tuple[int, bytes], list[int]] = {}
+        self.signatures: list[np.ndarray] = []
+        self.numbers: list[tuple[str, ...]] = []
+        self.extra_pages: dict[int, set] = {}
+        self.removed = 0
+        self.removed_text_bytes = 0
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.array([zlib.crc32(s.encode()) for s in shingles(text)], dtype=np.uint64)
+        # uint64 arithmetic wraps, as in the usual numpy MinHash formulation.
+        return ((np.outer(hashes, self.a) + self.b) % MERSENNE_PRIME).min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows : (band + 1) * self.rows].tobytes()
+
+    def _find(self, signature: np.ndarray, numbers: tuple[str, ...]) -> int | None:
+        seen = set()
+        for key in self._band_keys(signature):
+            for kept in self.buckets.get(key, ()):
+                if kept in seen:
+                    continue
+                seen.add(kept)
+                if self.numbers[kept] == numbers and np.mean(self.signatures[kept] == signature) >= self.threshold:
+                    return kept
+        return None
+
+    def filter(self, chunks: list[Document]) -> list[Document]:
+        """The chunks that are not near-duplicates of one kept earlier."""
+        kept = []
+        for chunk in chunks:
+            signature = self.signature(chunk.page_content)
+            chunk_numbers = numbers(chunk.page_content)
+            original = self._find(signature, chunk_numbers)
+            if original is not None:
+                self.extra_pages.setdefault(original, set()).add(chunk.metadata.get("page"))
+                self.removed += 1
+                self.removed_text_bytes += len(chunk.page_content)
+                continue
+            position = len(self.signatures)
+            self.signatures.append(signature)
+            self.numbers.append(chunk_numbers)
+            for key in self._band_keys(signature):
+                self.buckets.setdefault(key, []).append(position)
+            kept.append(chunk)
+        return kept
+
+    def annotate(self, kept: list[Document]) -> None:
+        """Record duplicate provenance on the kept chunks, given in the order ``filter`` kept them."""
+        for position, pages in self.extra_pages.items():
+            doc = kept[position]
+            pages = pages - {doc.metadata.get("page")}
+            if pages:
+                doc.metadata["also_on_pages"] = sorted(p for p in pages if p is not None)
@@ -0,0 +1,142 @@
+import json
+import mmap
+import os
+
+import numpy as np
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+
+ROW_DTYPE = np.dtype([("end", "<i8"), ("page", "<i4"), ("start_index", "<i8"), ("shared", "<i4")])
+# Metadata keys that differ from chunk to chunk get their own column; -1 means absent.
+ROW_KEYS = ("page", "start_index")
+TEXT_FILE = "chunks.txt"
+ROWS_FILE = "chunks.npy"
+META_FILE = "chunks.json"
+
+
+class ChunkStore(Docstore, AddableMixin):
+    """FAISS docstore keeping chunks as columns instead of ``Document`` objects.
+
+    All chunk text lives in one UTF-8 buffer; a structured array holds each
+    chunk's end offset, page and start index, plus a reference into a list
+    of distinct remaining metadata dicts (source, doc_id, ... are shared by
+    every chunk of a document). ``search`` builds a ``Document`` only for the
+    chunk asked for.
+
+    ``save`` writes the live chunks to three files; ``load`` can map the text
+    and the rows read-only, so opening a store costs little more than
+    reading its ids and the shared metadata.
+    """
+
+    def __init__(self):
+        self.text = bytearray()
+        self.rows = np.empty(0, dtype=ROW_DTYPE)
+        self.ids: list[str | None] = []
+        self.shared: list[dict] = []
+        self._shared_keys: dict[str, int] | None = {}
+        self._row_of: dict[str, int] | None = {}
+
+    def __len__(self) -> int:
+        return len(self._positions())
+
+    def _positions(self) -> dict[str, int]:
+        # Built on first use after a load.
+        if self._row_of is None:
+            self._row_of = {chunk_id: row for row, chunk_id in enumerate(self.ids) if chunk_id is not None}
+        return self._row_of
+
+    def _shared_index(self, metadata: dict) -> int:
+        if self._shared_keys is None:
+            self._shared_keys = {json.dumps(m, sort_keys=True, default=str): i for i, m in enumerate(self.shared)}
+        key = json.dumps(metadata, sort_keys=True, default=str)
+        if key not in self._shared_keys:
+            self._shared_keys[key] = len(self.shared)
+            self.shared.append(metadata)
+        return self._shared_keys[key]
+
+    def add(self, texts: dict[str, Document]) -> None:
+        positions = self._positions()
+        overlapping = set(texts).intersection(positions)
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+        if not isinstance(self.text, bytearray):
+            # Loaded read-only; take a private copy before changing anything.
+            self.text = bytearray(self.text)
+        rows = np.empty(len(texts), dtype=ROW_DTYPE)
+        end = int(self.rows["end"][-1]) if len(self.rows) else 0
+        for n, (chunk_id, doc) in enumerate(texts.items()):
+            encoded = doc.page_content.encode("utf-8")
+            self.text += encoded
+            end += len(encoded)
+            metadata = dict(doc.metadata)
+            columns = [
+                metadata.pop(key) if isinstance(metadata.get(key), int) and metadata[key] >= 0 else -1
+                for key in ROW_KEYS
+            ]
+            rows[n] = (end, *columns, self._shared_index(metadata))
+            positions[chunk_id] = len(self.ids)
+            self.ids.append(chunk_id)
+        self.rows = np.concatenate([self.rows, rows])
+
+    def delete(self, ids: list) -> None:
+        positions = self._positions()
+        if not set(ids).intersection(positions):
+            raise ValueError(f"Tried to delete ids that does not  exist: {ids}")
+        # Rows are only forgotten here; save() writes the live ones.
+        for chunk_id in ids:
+            row = positions.pop(chunk_id, None)
+            if row is not None:
+                self.ids[row] = None
+
+    def search(self, search: str) -> str | Document:
+        row = self._positions().get(search)
+        if row is None:
+            return f"ID {search} not found."
+        end, page, start_index, shared = self.rows[row].tolist()
+        start = int(self.rows["end"][row - 1]) if row else 0
+        metadata = dict(self.shared[shared])
+        for key, value in zip(ROW_KEYS, (page, start_index)):
+            if value >= 0:
+                metadata[key] = value
+        return Document(id=search, page_content=bytes(self.text[start:end]).decode("utf-8"), metadata=metadata)
+
+    @property
+    def nbytes(self) -> int:
+        # The ids are the only per-chunk Python objects left.
+        return len(self.text) + self.rows.nbytes + 80 * len(self.ids)
+
+    def save(self, path: str) -> None:
+        live = [row for row, chunk_id in enumerate(self.ids) if chunk_id is not None]
+        ends = self.rows["end"]
+        rows = self.rows[live].copy()
+        with open(os.path.join(path, TEXT_FILE), "wb") as f:
+            end = 0
+            for n, row in enumerate(live):
+                start = int(ends[row - 1]) if row else 0
+                f.write(self.text[start:int(ends[row])])
+                end += int(ends[row]) - start
+                rows["end"][n] = end
+        np.save(os.path.join(path, ROWS_FILE), rows)
+        with open(os.path.join(path, META_FILE), "w") as f:
+            json.dump({"ids": [self.ids[row] for row in live], "shared": self.shared}, f, default=str)
+
+    @classmethod
+    def load(cls, path: str, mmap_files: bool = False) -> "ChunkStore":
+        store = cls()
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        store.ids = meta["ids"]
+        store.shared = meta["shared"]
+        store._shared_keys = None
+        store._row_of = None
+        text_path = os.path.join(path, TEXT_FILE)
+        if mmap_files and os.path.getsize(text_path):
+            with open(text_path, "rb") as f:
+                store.text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            with open(text_path, "rb") as f:
+                store.text = bytearray(f.read())
+        rows = np.load(os.path.join(path, ROWS_FILE), mmap_mode="r" if mmap_files else None)
+        # A plain ndarray view of the mapping skips np.memmap's per-access overhead.
+        store.rows = rows.view(np.ndarray) if mmap_files else np.array(rows)
+        return store
@@ -0,0 +1,157 @@
+import re
+
+import numpy as np
+from langchain_core.documents import Document
+
+from embedding_batcher import estimate_tokens
+
+WORD_RE = re.compile(r"\w+")
+
+
+def shingles(text: str, n: int = 3) -> set[tuple[str, ...]]:
+    words = WORD_RE.findall(text.lower())
+    return {tuple(words[i : i + n]) for i in range(max(1, len(words) - n + 1))}
+
+
+def jaccard(a: set, b: set) -> float:
+    union = len(a | b)
+    return len(a & b) / union if union else 1.0
+
+
+def text_overlap(a: str, b: str, max_overlap: int) -> int:
+    """Length of the longest suffix of ``a`` that is also a prefix of ``b``."""
+    for n in range(min(len(a), len(b), max_overlap), 0, -1):
+        if a.endswith(b[:n]):
+            return n
+    return 0
+
+
+def chunk_position(doc: Document) -> tuple[str, int] | None:
+    # Corpus chunk ids are "{doc_id}:{n}" with n in splitter order.
+    if not doc.id or ":" not in doc.id:
+        return None
+    doc_id, n = doc.id.rsplit(":", 1)
+    return (doc_id, int(n)) if n.isdigit() else None
+
+
+def drop_near_duplicates(docs: list[Document], threshold: float) -> list[int]:
+    """Indexes of ``docs`` to keep; a passage whose shingle Jaccard similarity
+    to a better-ranked kept one is >= ``threshold`` is dropped."""
+    keep, kept_shingles = [], []
+    for i, doc in enumerate(docs):
+        s = shingles(doc.page_content)
+        if any(jaccard(s, other) >= threshold for other in kept_shingles):
+            continue
+        keep.append(i)
+        kept_shingles.append(s)
+    return keep
+
+
+def mmr(query_vector, vectors: np.ndarray, k: int, lambda_mult: float) -> list[int]:
+    """Maximal marginal relevance: pick ``k`` rows of ``vectors`` that are
+    relevant to the query but not to each other."""
+    if len(vectors) == 0:
+        return []
+    v = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    q = np.asarray(query_vector, dtype=np.float32)
+    q = q / max(float(np.linalg.norm(q)), 1e-12)
+    relevance = v @ q
+    selected = [int(np.argmax(relevance))]
+    redundancy = v @ v[selected[0]]
+    while len(selected) < min(k, len(v)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        redundancy = np.maximum(redundancy, v @ v[best])
+    return selected
+
+
+def merge_adjacent(docs: list[Document], max_overlap: int) -> tuple[list[Document], int]:
+    """Join consecutive chunks of the same page into one passage, dropping
+    the text the splitter repeated between them. Passages keep the order of
+    their best-ranked chunk. Returns the passages and the number of merges."""
+    order = sorted(range(len(docs)), key=lambda i: (chunk_position(docs[i]) or ("", -1), i))
+    groups: list[list[int]] = []
+    for i in order:
+        if groups:
+            prev = docs[groups[-1][-1]]
+            pos, prev_pos = chunk_position(docs[i]), chunk_position(prev)
+            if (
+                pos is not None
+                and prev_pos is not None
+                and pos == (prev_pos[0], prev_pos[1] + 1)
+                and docs[i].metadata.get("page") == prev.metadata.get("page")
+            ):
+                groups[-1].append(i)
+                continue
+        groups.append([i])
+
+    passages = []
+    for group in sorted(groups, key=min):
+        first = docs[group[0]]
+        text = first.page_content
+        end = first.metadata.get("start_index", 0) + len(text)
+        for i in group[1:]:
+            doc = docs[i]
+            start = doc.metadata.get("start_index")
+            if start is not None and "start_index" in first.metadata:
+                skip = max(0, end - start)
+            else:
+                skip = text_overlap(text, doc.page_content, max_overlap)
+            text = text + ("" if skip else "\n") + doc.page_content[skip:]
+            end = (start or 0) + len(doc.page_content)
+        passages.append(Document(id=first.id, page_content=text, metadata=dict(first.metadata)))
+    merges = len(docs) - len(groups)
+    return passages, merges
+
+
+def pack(passages: list[Document], token_budget: int) -> list[Document]:
+    """Greedily keep passages, in rank order, while they fit in ``token_budget``.
+    The top passage is truncated rather than dropped if it alone is too long."""
+    packed, used = [], 0
+    for doc in passages:
+        tokens = estimate_tokens(doc.page_content)
+        if used + tokens <= token_budget:
+            packed.append(doc)
+            used += tokens
+        elif not packed:
+            text = doc.page_content[: token_budget * 4]
+            packed.append(Document(id=doc.id, page_content=text, metadata=doc.metadata))
+            used += estimate_tokens(text)
+    return packed
+
+
+def build_context(
+    candidates: list[Document],
+    query_vector,
+    vectors: np.ndarray,
+    k: int = 4,
+    token_budget: int = 1500,
+    lambda_mult: float = 0.7,
+    duplicate_threshold: float = 0.8,
+    max_overlap: int = 200,
+) -> tuple[list[Document], dict]:
+    """Turn ranked retrieval candidates into the passages sent to the model.
+
+    Near-duplicates are dropped, ``k`` chunks are chosen by MMR over their
+    stored ``vectors``, consecutive chunks are merged and the result is packed
+    into ``token_budget`` (estimated) tokens. The stats compare against
+    ``baseline_tokens``, the top ``k`` candidates joined as-is.
+    """
+    keep = drop_near_duplicates(candidates, duplicate_threshold)
+    picked = [keep[i] for i in mmr(query_vector, np.asarray(vectors, dtype=np.float32)[keep], k, lambda_mult)]
+    passages, merges = merge_adjacent([candidates[i] for i in picked], max_overlap)
+    packed = pack(passages, token_budget)
+
+    baseline = sum(estimate_tokens(doc.page_content) for doc in candidates[:k])
+    used = sum(estimate_tokens(doc.page_content) for doc in packed)
+    return packed, {
+        "candidates": len(candidates),
+        "duplicates_removed": len(candidates) - len(keep),
+        "chunks_merged": merges,
+        "passages": len(packed),
+        "baseline_tokens": baseline,
+        "context_tokens": used,
+        "saved_tokens": baseline - used,
+    }
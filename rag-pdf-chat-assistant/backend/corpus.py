@@ -0,0 +1,350 @@
+import os
+import pickle
+import tempfile
+import threading
+from contextlib import nullcontext
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from chunk_store import ChunkStore
+from index_cache import read_index
+from lexical import BM25Index
+from vector_file import VectorFile, rerank
+from index_factory import (
+    IndexConfig,
+    build_index,
+    empty_clone,
+    ensure_direct_map,
+    reconstruct_all,
+    reduce_dims,
+    resident_bytes,
+    set_search_params,
+    supports_remove,
+)
+
+
+def export_vectors(vectorstore: FAISS) -> tuple[list[Document], np.ndarray]:
+    """Return a vectorstore's documents and their stored vectors (float32, one row each) in index order."""
+    ids = [vectorstore.index_to_docstore_id[i] for i in range(vectorstore.index.ntotal)]
+    docs = [vectorstore.docstore.search(_id) for _id in ids]
+    return docs, vectorstore.index.reconstruct_n(0, vectorstore.index.ntotal)
+
+
+class Corpus:
+    """A single FAISS index holding many documents, each addressable by id.
+
+    Chunks are stored under ``"{doc_id}:{n}"`` docstore ids and carry
+    ``doc_id`` in their metadata, so a document can be removed or replaced
+    without re-embedding the rest of the corpus and searches can be limited
+    to a subset of documents. ``version`` changes whenever the document set
+    does.
+
+    Mutations and searches are serialised by ``lock`` so they can run on
+    executor threads while the event loop keeps serving requests. A
+    read-only corpus (a loaded snapshot) never changes, so its searches skip
+    the lock and the vector and BM25 retrievers run in parallel.
+
+    A BM25 inverted index over the same chunk ids is maintained alongside
+    the vectors for exact-match (lexical) retrieval.
+
+    Chunk text and metadata are kept in a columnar ``ChunkStore`` rather
+    than as ``Document`` objects; only retrieved chunks become Documents.
+
+    The FAISS index type comes from ``index_config``. Types that need
+    training start out flat and are converted once the corpus reaches
+    ``train_size`` vectors. Indexes whose ``remove_ids`` does not compact ids
+    (HNSW, IVF) handle deletes by re-adding the surviving stored vectors to an
+    emptied copy of the index, which keeps its training and needs no
+    embedding calls.
+
+    When ``index_config.search_dims`` is set the index stores shortened
+    vectors and the full ones live in a memory-mapped ``VectorFile`` at
+    ``full_vectors_path`` (a temporary file by default), used to rerank
+    search candidates.
+    """
+
+    def __init__(self, embeddings, index_config: IndexConfig | None = None, full_vectors_path: str | None = None):
+        self.embeddings = embeddings
+        self.index_config = index_config or IndexConfig()
+        self.full_vectors_path = full_vectors_path
+        self.full_vectors: VectorFile | None = None
+        self.read_only = False
+        self.vectorstore: FAISS | None = None
+        self.trained = False
+        self.lexical = BM25Index()
+        self.documents: dict[str, dict] = {}
+        self.version = 0
+        self.lock = threading.RLock()
+        self._positions: dict[str, int] = {}
+        self._positions_version = None
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.documents
+
+    @property
+    def num_chunks(self) -> int:
+        return self.vectorstore.index.ntotal if self.vectorstore is not None else 0
+
+    def add_document(
+        self,
+        doc_id: str,
+        chunks: list[Document],
+        vectors: np.ndarray | list[list[float]] | None = None,
+        filename: str | None = None,
+        content_hash: str | None = None,
+    ) -> int:
+        """Add (or replace) a document. Only the new chunks are embedded and indexed."""
+        texts = [c.page_content for c in chunks]
+        metadatas = [{**c.metadata, "doc_id": doc_id} for c in chunks]
+        ids = [f"{doc_id}:{n}" for n in range(len(chunks))]
+        self._check_writable()
+        if vectors is None and chunks:
+            vectors = self.embeddings.embed_documents(texts)
+        if chunks:
+            vectors = np.asarray(vectors, dtype=np.float32)
+
+        with self.lock:
+            if doc_id in self.documents:
+                self.delete_document(doc_id)
+            if not chunks:
+                return 0
+            index_vectors = self._index_vectors(ids, vectors)
+            if self.vectorstore is None:
+                self.vectorstore = FAISS(
+                    self.embeddings, self._empty_index(len(index_vectors[0])), ChunkStore(), {}
+                )
+            self._add_to_index(ids, texts, metadatas, index_vectors)
+            self._maybe_train()
+            for chunk_id, text in zip(ids, texts):
+                self.lexical.add(chunk_id, text)
+
+            self.documents[doc_id] = {
+                "doc_id": doc_id,
+                "filename": filename,
+                "content_hash": content_hash,
+                "chunks": len(ids),
+                "text_bytes": sum(len(t) for t in texts),
+            }
+            self.version += 1
+        return len(ids)
+
+    def delete_document(self, doc_id: str) -> bool:
+        self._check_writable()
+        with self.lock:
+            info = self.documents.pop(doc_id, None)
+            if info is None:
+                return False
+            ids = [f"{doc_id}:{n}" for n in range(info["chunks"])]
+            if supports_remove(self.vectorstore.index):
+                self.vectorstore.delete(ids)
+            else:
+                self._rebuild(drop=set(ids))
+            for chunk_id in ids:
+                self.lexical.remove(chunk_id)
+            if self.full_vectors is not None:
+                self.full_vectors.delete_many(ids)
+            self.version += 1
+        return True
+
+    def _read_lock(self):
+        return nullcontext() if self.read_only else self.lock
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise RuntimeError("Corpus was loaded as a read-only snapshot")
+
+    def memory_bytes(self) -> int:
+        """Rough resident size: the index and chunk store, plus chunk text
+        counted twice more for the BM25 postings and their Python overhead."""
+        if self.vectorstore is None:
+            return 0
+        text = sum(d.get("text_bytes", 0) for d in self.documents.values())
+        return resident_bytes(self.vectorstore.index) + self.vectorstore.docstore.nbytes + 2 * text
+
+    def save(self, path: str) -> None:
+        """Write the corpus into directory ``path``; ``Corpus.load`` reads it back.
+
+        Full vectors of a two-stage corpus stay in their own file, which is
+        flushed but not copied.
+        """
+        with self.lock:
+            os.makedirs(path, exist_ok=True)
+            if self.vectorstore is not None:
+                # Saved with its direct map, so a read-only IVF copy can still reconstruct vectors.
+                ensure_direct_map(self.vectorstore.index)
+                faiss.write_index(self.vectorstore.index, os.path.join(path, "index.faiss"))
+                self.vectorstore.docstore.save(path)
+                # Positions are dense, so the docstore ids in index order are enough.
+                ids = self.vectorstore.index_to_docstore_id
+                with open(os.path.join(path, "index_ids.txt"), "w") as f:
+                    f.write("\n".join(ids[i] for i in range(len(ids))))
+            state = {
+                "documents": self.documents,
+                "version": self.version,
+                "trained": self.trained,
+                "lexical": self.lexical,
+                "full_vectors": self.full_vectors,
+            }
+            with open(os.path.join(path, "corpus.pkl"), "wb") as f:
+                pickle.dump(state, f)
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        embeddings,
+        index_config: IndexConfig | None = None,
+        full_vectors_path=None,
+        mmap: bool = False,
+    ) -> "Corpus":
+        """Read a saved corpus. With ``mmap`` the index and chunk store are
+        mapped read-only from disk where possible (shared between processes
+        through the page cache) and the corpus rejects changes."""
+        corpus = cls(embeddings, index_config, full_vectors_path)
+        with open(os.path.join(path, "corpus.pkl"), "rb") as f:
+            state = pickle.load(f)
+        corpus.documents = state["documents"]
+        corpus.version = state["version"]
+        corpus.trained = state["trained"]
+        corpus.lexical = state["lexical"]
+        corpus.full_vectors = state["full_vectors"]
+        if os.path.exists(os.path.join(path, "index.faiss")):
+            index_path = os.path.join(path, "index.faiss")
+            index = read_index(index_path) if mmap else faiss.read_index(index_path)
+            if os.path.exists(os.path.join(path, "index_ids.txt")):
+                with open(os.path.join(path, "index_ids.txt")) as f:
+                    index_to_docstore_id = dict(enumerate(f.read().split("\n"))) if index.ntotal else {}
+                docstore = ChunkStore.load(path, mmap_files=mmap)
+            else:
+                # Snapshots written before the chunk store pickled LangChain's docstore.
+                with open(os.path.join(path, "index.pkl"), "rb") as f:
+                    legacy, index_to_docstore_id = pickle.load(f)
+                docstore = ChunkStore()
+                docstore.add(legacy._dict)
+            set_search_params(index, corpus.index_config)
+            corpus.vectorstore = FAISS(embeddings, index, docstore, index_to_docstore_id)
+        corpus.read_only = mmap
+        return corpus
+
+    @property
+    def two_stage(self) -> bool:
+        return self.index_config.search_dims is not None
+
+    def _add_to_index(self, ids: list[str], texts: list[str], metadatas: list[dict], vectors: np.ndarray) -> None:
+        # What FAISS.add_embeddings does, without splitting the array into per-row vectors first.
+        start = self.vectorstore.index.ntotal
+        self.vectorstore.index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+        self.vectorstore.docstore.add(
+            {_id: Document(page_content=t, metadata=m) for _id, t, m in zip(ids, texts, metadatas)}
+        )
+        self.vectorstore.index_to_docstore_id.update({start + i: _id for i, _id in enumerate(ids)})
+
+    def _index_vectors(self, ids: list[str], vectors: np.ndarray) -> np.ndarray:
+        """Vectors to put in the index, keeping full ones aside in two-stage mode."""
+        if not self.two_stage:
+            return vectors
+        if self.full_vectors is None:
+            path = self.full_vectors_path or os.path.join(tempfile.mkdtemp(prefix="rag-vectors-"), "full.f32")
+            self.full_vectors = VectorFile(path, len(vectors[0]))
+        self.full_vectors.put_many(ids, vectors)
+        return reduce_dims(vectors, self.index_config.search_dims)
+
+    def _empty_index(self, dim: int):
+        self.trained = not self.index_config.needs_training
+        if not self.trained:
+            return build_index(IndexConfig(index_type="flat"), dim)
+        return build_index(self.index_config, dim)
+
+    def _maybe_train(self) -> None:
+        if not self.trained and self.num_chunks >= self.index_config.train_size:
+            self._rebuild(retrain=True)
+            self.trained = True
+
+    def rebuild(self, retrain: bool = False) -> None:
+        """Rebuild the index from its stored vectors, training a fresh one if asked."""
+        self._check_writable()
+        with self.lock:
+            self._rebuild(retrain=retrain)
+
+    def _rebuild(self, drop: set[str] = frozenset(), retrain: bool = False) -> None:
+        store = self.vectorstore
+        vectors = reconstruct_all(store.index)
+        keep = [i for i in range(store.index.ntotal) if store.index_to_docstore_id[i] not in drop]
+        kept_vectors = np.ascontiguousarray(vectors[keep])
+        if retrain:
+            index = build_index(self.index_config, vectors.shape[1], kept_vectors)
+        else:
+            index = empty_clone(store.index, self.index_config)
+        if len(keep):
+            index.add(kept_vectors)
+        if drop:
+            store.docstore.delete(list(drop))
+        store.index = index
+        store.index_to_docstore_id = {n: store.index_to_docstore_id[i] for n, i in enumerate(keep)}
+
+    def list_documents(self) -> list[dict]:
+        return list(self.documents.values())
+
+    def fetch_k(self, doc_ids: list[str] | None, k: int) -> int:
+        """How many neighbours to fetch so that ``k`` remain after filtering to ``doc_ids``."""
+        if not doc_ids:
+            return k
+        subset = sum(self.documents[d]["chunks"] for d in doc_ids if d in self.documents)
+        # Over-fetch in proportion to how small the subset is.
+        return min(self.num_chunks, max(20, k * self.num_chunks // max(subset, 1)))
+
+    def vector_candidates(self, vector: list[float], n: int, doc_ids: list[str] | None = None) -> list[str]:
+        """Chunk ids of the ``n`` nearest vectors, best first."""
+        return self.vector_candidates_many([vector], n, doc_ids)[0]
+
+    def vector_candidates_many(self, vectors, n: int, doc_ids: list[str] | None = None) -> list[list[str]]:
+        """``vector_candidates`` for several queries with a single index search."""
+        queries = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        with self._read_lock():
+            if self.vectorstore is None:
+                return [[] for _ in queries]
+            keep = n * self.index_config.rerank_factor if self.two_stage else n
+            search = reduce_dims(queries, self.index_config.search_dims) if self.two_stage else queries
+            _, positions = self.vectorstore.index.search(search, self.fetch_k(doc_ids, keep))
+            mapping = self.vectorstore.index_to_docstore_id
+            wanted = set(doc_ids) if doc_ids else None
+            results = []
+            for query, row in zip(queries, positions):
+                ids = [mapping[p] for p in row if p >= 0]
+                if wanted is not None:
+                    ids = [i for i in ids if i.rsplit(":", 1)[0] in wanted]
+                ids = ids[:keep]
+                if self.two_stage and ids:
+                    ids = [ids[i] for i in rerank(query, self.full_vectors.get_many(ids), n)]
+                results.append(ids[:n])
+            return results
+
+    def lexical_candidates(self, query: str, n: int, doc_ids: list[str] | None = None) -> list[str]:
+        """Chunk ids of the ``n`` best BM25 matches, best first."""
+        allowed = None
+        if doc_ids:
+            wanted = set(doc_ids)
+            allowed = lambda chunk_id: chunk_id.rsplit(":", 1)[0] in wanted  # noqa: E731
+        with self._read_lock():
+            return [chunk_id for chunk_id, _ in self.lexical.search(query, n, allowed)]
+
+    def get_documents(self, chunk_ids: list[str]) -> list[Document]:
+        with self._read_lock():
+            return [self.vectorstore.docstore.search(chunk_id) for chunk_id in chunk_ids]
+
+    def get_vectors(self, chunk_ids: list[str]) -> np.ndarray:
+        """Stored vectors for ``chunk_ids`` (lossy for PQ/SQ8 storage)."""
+        with self.lock:
+            if self.full_vectors is not None:
+                return self.full_vectors.get_many(chunk_ids)
+            if self._positions_version != self.version:
+                self._positions = {v: k for k, v in self.vectorstore.index_to_docstore_id.items()}
+                self._positions_version = self.version
+            index = self.vectorstore.index
+            if not chunk_ids:
+                return np.empty((0, index.d), dtype=np.float32)
+            ensure_direct_map(index)
+            return np.stack([index.reconstruct(self._positions[chunk_id]) for chunk_id in chunk_ids])
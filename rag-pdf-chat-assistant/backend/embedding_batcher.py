@@ -0,0 +1,144 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+from azure.core.exceptions import HttpResponseError
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text with the OpenAI tokenizers.
+    return len(text) // 4 + 1
+
+
+def make_batches(texts: list[str], max_tokens: int, max_items: int) -> list[list[int]]:
+    """Group text positions into batches bounded by estimated tokens and item count."""
+    batches, current, current_tokens = [], [], 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def retry_after_seconds(error: HttpResponseError) -> float | None:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class EmbeddingBatcher:
+    """Splits embedding requests into token-bounded batches and runs them concurrently.
+
+    ``embed_batch`` takes a list of texts and returns their vectors in order;
+    ``aembed_batch`` is its coroutine counterpart used by ``aembed``.
+    Batches failing with 429/5xx are retried with exponential backoff and
+    jitter, waiting at least as long as the server's Retry-After header.
+    """
+
+    def __init__(
+        self,
+        embed_batch=None,
+        aembed_batch=None,
+        max_batch_tokens: int = 16000,
+        max_batch_size: int = 128,
+        concurrency: int = 4,
+        max_retries: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.embed_batch = embed_batch
+        self.aembed_batch = aembed_batch
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.last_stats = {}
+
+    def backoff(self, attempt: int, error: HttpResponseError) -> float:
+        delay = min(self.max_delay, self.base_delay * 2**attempt) * random.uniform(0.5, 1.0)
+        hint = retry_after_seconds(error)
+        return max(delay, hint) if hint is not None else delay
+
+    def _run_batch(self, texts: list[str]) -> list[list[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.embed_batch(texts)
+            except HttpResponseError as e:
+                if e.status_code not in RETRYABLE_STATUS or attempt == self.max_retries:
+                    raise
+                time.sleep(self.backoff(attempt, e))
+
+    async def _arun_batch(self, texts: list[str]) -> list[list[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self.aembed_batch(texts)
+            except HttpResponseError as e:
+                if e.status_code not in RETRYABLE_STATUS or attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self.backoff(attempt, e))
+
+    def _assemble(self, texts, batches, results, start) -> list[list[float]]:
+        vectors = [None] * len(texts)
+        for idx, batch_vectors in zip(batches, results):
+            for i, vector in zip(idx, batch_vectors):
+                vectors[i] = vector
+
+        elapsed = time.perf_counter() - start
+        self.last_stats = {
+            "chunks": len(texts),
+            "batches": len(batches),
+            "seconds": elapsed,
+            "chunks_per_sec": len(texts) / elapsed if elapsed else 0.0,
+        }
+        return vectors
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        start = time.perf_counter()
+        batches = make_batches(texts, self.max_batch_tokens, self.max_batch_size)
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as pool:
+            results = list(pool.map(lambda idx: self._run_batch([texts[i] for i in idx]), batches))
+        return self._assemble(texts, batches, results, start)
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        start = time.perf_counter()
+        batches = make_batches(texts, self.max_batch_tokens, self.max_batch_size)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(idx):
+            async with semaphore:
+                return await self._arun_batch([texts[i] for i in idx])
+
+        results = await asyncio.gather(*(run(idx) for idx in batches))
+        return self._assemble(texts, batches, results, start)
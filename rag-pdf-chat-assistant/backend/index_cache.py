@@ -0,0 +1,102 @@
+import hashlib
+import os
+import pickle
+import shutil
+import threading
+from pathlib import Path
+
+import faiss
+from langchain_community.vectorstores import FAISS
+
+# Flat indexes can be mapped straight from disk on faiss >= 1.8; older builds
+# only support mmap for IVF lists, so fall back to a regular read there.
+_MMAP_FLAG = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+
+
+def index_key(content_hash: str, chunk_size: int, chunk_overlap: int, model: str, dedup_threshold: float = 0) -> str:
+    """Cache key for an ingested PDF: file hash + splitter and dedup settings + embedding model."""
+    h = hashlib.sha256(content_hash.encode())
+    h.update(f"|{chunk_size}|{chunk_overlap}|{model}".encode())
+    if dedup_threshold:
+        # v2: numbers are no longer folded, so older entries may be missing chunks.
+        h.update(f"|dedup=v2:{dedup_threshold}".encode())
+    return h.hexdigest()
+
+
+def dir_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def read_index(path: Path):
+    try:
+        return faiss.read_index(str(path), _MMAP_FLAG | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        return faiss.read_index(str(path))
+
+
+class IndexCache:
+    """Content-addressed on-disk cache of FAISS vectorstores with LRU eviction.
+
+    Each entry is a directory named after its key holding ``index.faiss`` and
+    ``index.pkl`` (the same layout as ``FAISS.save_local``). Directory mtimes
+    track recency; once the cache grows past ``max_bytes`` the least recently
+    used entries are removed.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def get(self, key: str, embeddings) -> FAISS | None:
+        path = self._path(key)
+        try:
+            index = read_index(path / "index.faiss")
+            with open(path / "index.pkl", "rb") as f:
+                docstore, index_to_docstore_id = pickle.load(f)
+        except (FileNotFoundError, RuntimeError):
+            return None
+        os.utime(path)
+        return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+    def put(self, key: str, vectorstore: FAISS) -> None:
+        path = self._path(key)
+        if path.exists():
+            return
+        # Write to a private directory first so readers never see a half-written entry.
+        tmp = self.root / f".tmp-{key}-{os.getpid()}-{threading.get_ident()}"
+        vectorstore.save_local(str(tmp))
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            # Another worker published the same key first.
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict(keep=key)
+
+    def evict(self, keep: str | None = None) -> None:
+        with self._lock:
+            entries = []
+            for path in self.root.iterdir():
+                if not path.is_dir() or path.name.startswith("."):
+                    continue
+                entries.append((path.stat().st_mtime, dir_size(path), path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path.name == keep:
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+
+    def stats(self) -> dict:
+        entries = [p for p in self.root.iterdir() if p.is_dir() and not p.name.startswith(".")]
+        return {
+            "entries": len(entries),
+            "bytes": sum(dir_size(p) for p in entries),
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,153 @@
+import math
+import os
+from dataclasses import dataclass
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq", "sq8", "fp16")
+
+
+@dataclass
+class IndexConfig:
+    """Which FAISS index the corpus uses and how it is built and searched.
+
+    ``flat`` is exact search over float32 vectors. ``hnsw`` is a graph index
+    (tune ``ef_search``). ``ivf_flat`` / ``ivf_pq`` partition vectors into
+    ``nlist`` cells and scan ``nprobe`` of them; ``ivf_pq`` also compresses
+    each vector to ``pq_m`` bytes (at 8 bits). ``sq8`` / ``fp16`` are exact
+    scans over 1- or 2-byte-per-dimension scalar-quantized storage.
+
+    With ``search_dims`` set, the index holds only the first ``search_dims``
+    components of each embedding (renormalized, as text-embedding-3 models
+    allow) and the ``rerank_factor * k`` candidates it returns are reranked
+    against the full vectors.
+    """
+
+    index_type: str = "flat"
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    ef_search: int = 64
+    nlist: int | None = None  # None: derived from the number of training vectors
+    nprobe: int = 16
+    pq_m: int = 64
+    pq_nbits: int = 8
+    train_size: int = 10000  # corpus stays flat until it has this many vectors
+    search_dims: int | None = None  # None: index full-dimension vectors
+    rerank_factor: int = 4
+
+    def __post_init__(self):
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type {self.index_type!r}, expected one of {INDEX_TYPES}")
+
+    @classmethod
+    def from_env(cls) -> "IndexConfig":
+        nlist = os.getenv("INDEX_NLIST")
+        search_dims = os.getenv("INDEX_SEARCH_DIMS")
+        return cls(
+            index_type=os.getenv("INDEX_TYPE", "flat"),
+            hnsw_m=int(os.getenv("INDEX_HNSW_M", "32")),
+            ef_construction=int(os.getenv("INDEX_EF_CONSTRUCTION", "200")),
+            ef_search=int(os.getenv("INDEX_EF_SEARCH", "64")),
+            nlist=int(nlist) if nlist else None,
+            nprobe=int(os.getenv("INDEX_NPROBE", "16")),
+            pq_m=int(os.getenv("INDEX_PQ_M", "64")),
+            pq_nbits=int(os.getenv("INDEX_PQ_NBITS", "8")),
+            train_size=int(os.getenv("INDEX_TRAIN_SIZE", "10000")),
+            search_dims=int(search_dims) if search_dims else None,
+            rerank_factor=int(os.getenv("INDEX_RERANK_FACTOR", "4")),
+        )
+
+    @property
+    def needs_training(self) -> bool:
+        return self.index_type in ("ivf_flat", "ivf_pq", "sq8")
+
+
+def reduce_dims(vectors, dims: int) -> np.ndarray:
+    """The first ``dims`` components of each vector, rescaled to unit length."""
+    reduced = np.array(np.atleast_2d(vectors)[:, :dims], dtype=np.float32, order="C")  # always a copy
+    faiss.normalize_L2(reduced)
+    return reduced
+
+
+def auto_nlist(n: int) -> int:
+    # ~sqrt(n) cells, keeping at least 39 training points per cell as FAISS recommends.
+    return max(1, min(int(4 * math.sqrt(n)), n // 39, 65536))
+
+
+def factory_string(config: IndexConfig, n: int) -> str:
+    nlist = config.nlist or auto_nlist(n)
+    return {
+        "flat": "Flat",
+        "hnsw": f"HNSW{config.hnsw_m}",
+        "ivf_flat": f"IVF{nlist},Flat",
+        "ivf_pq": f"IVF{nlist},PQ{config.pq_m}x{config.pq_nbits}",
+        "sq8": "SQ8",
+        "fp16": "SQfp16",
+    }[config.index_type]
+
+
+def build_index(config: IndexConfig, dim: int, train_vectors: np.ndarray | None = None):
+    """Create an empty index for ``config``, trained on ``train_vectors`` if the type needs it."""
+    n = len(train_vectors) if train_vectors is not None else 0
+    index = faiss.index_factory(dim, factory_string(config, n), faiss.METRIC_L2)
+    if config.index_type == "hnsw":
+        index.hnsw.efConstruction = config.ef_construction
+    if not index.is_trained:
+        if train_vectors is None:
+            raise ValueError(f"{config.index_type} index needs training vectors")
+        index.train(np.ascontiguousarray(train_vectors, dtype=np.float32))
+    set_search_params(index, config)
+    return index
+
+
+def set_search_params(index, config: IndexConfig) -> None:
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = config.nprobe
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = config.ef_search
+
+
+def empty_clone(index, config: IndexConfig):
+    """An empty index with the same structure and training as ``index``."""
+    clone = faiss.clone_index(index)
+    clone.reset()
+    set_search_params(clone, config)
+    return clone
+
+
+def supports_remove(index) -> bool:
+    """Whether ``remove_ids`` compacts ids the way LangChain's FAISS.delete assumes."""
+    return isinstance(index, faiss.IndexFlatCodes)
+
+
+def ensure_direct_map(index) -> None:
+    """IVF indexes can only reconstruct vectors by id once they keep a direct map."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and ivf.direct_map.type == faiss.DirectMap.NoMap:
+        ivf.make_direct_map()
+
+
+def reconstruct_all(index) -> np.ndarray:
+    """Stored vectors in id order (lossy for PQ/SQ8 storage)."""
+    ensure_direct_map(index)
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def index_bytes(index) -> int:
+    return faiss.serialize_index(index).nbytes
+
+
+def resident_bytes(index) -> int:
+    """Approximate memory held by ``index``, cheap enough to call per request."""
+    n = index.ntotal
+    if isinstance(index, faiss.IndexFlatCodes):
+        return n * index.code_size
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return n * (ivf.code_size + 8) + ivf.quantizer.ntotal * ivf.d * 4
+    if hasattr(index, "hnsw"):
+        # Level-0 links dominate: 2 * M int32 neighbours per vector.
+        return resident_bytes(faiss.downcast_index(index.storage)) + n * index.hnsw.nb_neighbors(0) * 4
+    return index_bytes(index)
@@ -0,0 +1,280 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, field
+
+from langchain_community.vectorstores import FAISS
+
+from corpus import export_vectors
+from pdf_parsing import aiter_pages
+from rag_pipeline import embeddings, make_deduplicator, splitter
+
+_DONE = object()
+
+
+@dataclass
+class IngestJob:
+    doc_id: str
+    filename: str
+    path: str
+    key: str
+    session_id: str = "default"
+    content_hash: str = ""
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "queued"  # queued -> running -> done | failed
+    total_pages: int = 0
+    pages_parsed: int = 0
+    chunks_split: int = 0
+    chunks_deduplicated: int = 0
+    chunks_embedded: int = 0
+    chunks_indexed: int = 0
+    index_bytes_saved: int = 0
+    cached: bool = False
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        del data["path"], data["key"]
+        return data
+
+
+class IngestionPipeline:
+    """Parse -> split -> embed -> index, with the stages running concurrently.
+
+    Stages are connected by small bounded queues, so embedding starts as soon
+    as the first pages are parsed and a slow stage throttles the ones
+    upstream of it instead of buffering the whole document. Up to
+    ``embed_concurrency`` chunk groups are embedded at once and handed to the
+    index stage in the order they were split. Near-duplicate
+    chunks are dropped after splitting, so they are never embedded. The
+    finished document is added to the corpus of the job's session.
+    """
+
+    def __init__(
+        self, sessions, index_cache, parse_pool, page_batch=8, parse_window=4, embed_batch=64,
+        embed_concurrency=4, queue_size=4,
+    ):
+        self.sessions = sessions
+        self.index_cache = index_cache
+        self.parse_pool = parse_pool
+        self.page_batch = page_batch
+        self.parse_window = parse_window
+        self.embed_batch = embed_batch
+        self.embed_concurrency = embed_concurrency
+        self.queue_size = queue_size
+        self.dedup_totals = {"chunks_deduplicated": 0, "index_bytes_saved": 0}
+
+    async def run(self, job: IngestJob) -> None:
+        doc_index = await asyncio.to_thread(self.index_cache.get, job.key, embeddings)
+        if doc_index is not None:
+            job.cached = True
+        else:
+            pages, chunks, vectors = (asyncio.Queue(self.queue_size) for _ in range(3))
+            result = {}
+            dedup = make_deduplicator()
+            await run_stages(
+                self._parse(job, pages),
+                self._split(job, pages, chunks, dedup),
+                self._embed(job, chunks, vectors),
+                self._index(job, vectors, result),
+            )
+            doc_index = result.get("index")
+            if doc_index is None:
+                return
+            if dedup is not None:
+                self._record_dedup(job, dedup, doc_index)
+            await asyncio.to_thread(self.index_cache.put, job.key, doc_index)
+
+        docs, doc_vectors = await asyncio.to_thread(export_vectors, doc_index)
+        async with self.sessions.write(job.session_id) as corpus:
+            await asyncio.to_thread(
+                corpus.add_document, job.doc_id, docs, doc_vectors, job.filename, job.content_hash
+            )
+        job.chunks_indexed = len(docs)
+
+    async def _parse(self, job, out):
+        # Page ranges are extracted in parallel across the pool but arrive in
+        # order, with at most parse_window ranges in flight.
+        def set_total(total):
+            job.total_pages = total
+
+        async for batch in aiter_pages(
+            job.path, self.parse_pool, self.page_batch, window=self.parse_window, on_total=set_total
+        ):
+            job.pages_parsed += len(batch)
+            await out.put(batch)
+        await out.put(_DONE)
+
+    async def _split(self, job, inp, out, dedup=None):
+        while (pages := await inp.get()) is not _DONE:
+            chunks = await asyncio.to_thread(splitter.split_documents, pages)
+            job.chunks_split += len(chunks)
+            if dedup is not None:
+                chunks = await asyncio.to_thread(dedup.filter, chunks)
+                job.chunks_deduplicated = dedup.removed
+            for start in range(0, len(chunks), self.embed_batch):
+                await out.put(chunks[start:start + self.embed_batch])
+        await out.put(_DONE)
+
+    def _record_dedup(self, job, dedup, doc_index) -> None:
+        # Index order is the order the deduplicator kept chunks in.
+        kept = [
+            doc_index.docstore.search(doc_index.index_to_docstore_id[i]) for i in range(doc_index.index.ntotal)
+        ]
+        dedup.annotate(kept)
+        # Each dropped chunk would have cost one embedding input and a float32
+        # vector plus its text in the index.
+        job.index_bytes_saved = dedup.removed * doc_index.index.d * 4 + dedup.removed_text_bytes
+        self.dedup_totals["chunks_deduplicated"] += dedup.removed
+        self.dedup_totals["index_bytes_saved"] += job.index_bytes_saved
+
+    async def _embed(self, job, inp, out):
+        # A FIFO of in-flight groups: the oldest is awaited first, so results
+        # go downstream in split order however the calls finish.
+        pending = deque()
+
+        async def emit():
+            chunks, task = pending.popleft()
+            vectors = await task
+            job.chunks_embedded += len(chunks)
+            await out.put((chunks, vectors))
+
+        try:
+            while (chunks := await inp.get()) is not _DONE:
+                task = asyncio.create_task(embeddings.aembed_documents([c.page_content for c in chunks]))
+                pending.append((chunks, task))
+                if len(pending) >= self.embed_concurrency:
+                    await emit()
+            while pending:
+                await emit()
+        finally:
+            for _, task in pending:
+                task.cancel()
+            await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+        await out.put(_DONE)
+
+    async def _index(self, job, inp, result):
+        while (item := await inp.get()) is not _DONE:
+            chunks, vectors = item
+            pairs = list(zip([c.page_content for c in chunks], vectors))
+            metadatas = [c.metadata for c in chunks]
+            if "index" not in result:
+                result["index"] = await asyncio.to_thread(
+                    FAISS.from_embeddings, pairs, embeddings, metadatas=metadatas
+                )
+            else:
+                await asyncio.to_thread(result["index"].add_embeddings, pairs, metadatas=metadatas)
+
+
+async def run_stages(*coros):
+    """Run pipeline stages together; if one fails, cancel the rest and re-raise."""
+    tasks = [asyncio.create_task(c) for c in coros]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+class IngestionQueue:
+    """Bounded FIFO of ingestion jobs drained by a fixed number of workers.
+
+    ``submit`` raises ``asyncio.QueueFull`` once ``max_pending`` jobs are
+    waiting, which the API turns into a 503 so clients back off instead of
+    piling more work onto the server.
+
+    With ``status_dir`` set, each job's state is also written there whenever
+    its status changes, so any worker process can answer ``get`` for it.
+    """
+
+    def __init__(self, run_job, max_pending=16, workers=2, keep_finished=500, status_dir=None):
+        self.run_job = run_job
+        self.status_dir = status_dir
+        if status_dir:
+            os.makedirs(status_dir, exist_ok=True)
+        self.queue: asyncio.Queue = asyncio.Queue(max_pending)
+        self.workers = workers
+        self.keep_finished = keep_finished
+        self.jobs: dict[str, IngestJob] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    def submit(self, job: IngestJob) -> IngestJob:
+        self.queue.put_nowait(job)
+        self.jobs[job.job_id] = job
+        self._record(job)
+        self._prune()
+        return job
+
+    def get(self, job_id: str) -> dict | None:
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self.status_dir and job_id.isalnum():
+            try:
+                with open(self._status_path(job_id)) as f:
+                    return json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+        return None
+
+    def _status_path(self, job_id: str) -> str:
+        return os.path.join(self.status_dir, f"{job_id}.json")
+
+    def _record(self, job: IngestJob) -> None:
+        if not self.status_dir:
+            return
+        tmp = self._status_path(job.job_id) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(job.to_dict(), f)
+        os.replace(tmp, self._status_path(job.job_id))
+
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    async def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self.queue.get()
+            job.status = "running"
+            self._record(job)
+            try:
+                await self.run_job(job)
+                job.status = "done"
+            except Exception as e:
+                print(f"Error ingesting {job.filename}: {e}")
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished_at = time.time()
+                self._record(job)
+                self.queue.task_done()
+                try:
+                    os.remove(job.path)
+                except OSError:
+                    pass
+
+    def _prune(self) -> None:
+        finished = [j for j in self.jobs.values() if j.finished_at is not None]
+        for job in sorted(finished, key=lambda j: j.finished_at)[: max(0, len(finished) - self.keep_finished)]:
+            del self.jobs[job.job_id]
+            if self.status_dir:
+                try:
+                    os.remove(self._status_path(job.job_id))
+                except OSError:
+                    pass
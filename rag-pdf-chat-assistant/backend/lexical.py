@@ -0,0 +1,94 @@
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+
+# Keeps identifiers such as "AB-1234", "4.2.1" or "ISO/IEC" as single tokens;
+# their parts are indexed as well so "1234" still matches "AB-1234".
+TOKEN_RE = re.compile(r"\w+(?:[-./]\w+)*")
+PART_RE = re.compile(r"[-./]")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with what "
+    "which who how when where does do".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for match in TOKEN_RE.finditer(text.lower()):
+        token = match.group()
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        parts = PART_RE.split(token)
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if p and p not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """In-memory inverted index scored with Okapi BM25.
+
+    Postings map each term to ``{chunk_id: term frequency}``, so adding or
+    removing a chunk only touches that chunk's own terms.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: dict[str, dict[str, int]] = defaultdict(dict)
+        self.doc_terms: dict[str, Counter] = {}
+        self.doc_length: dict[str, int] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+    def add(self, chunk_id: str, text: str) -> None:
+        if chunk_id in self.doc_terms:
+            self.remove(chunk_id)
+        terms = Counter(tokenize(text))
+        self.doc_terms[chunk_id] = terms
+        self.doc_length[chunk_id] = sum(terms.values())
+        self.total_length += self.doc_length[chunk_id]
+        for term, tf in terms.items():
+            self.postings[term][chunk_id] = tf
+
+    def remove(self, chunk_id: str) -> None:
+        terms = self.doc_terms.pop(chunk_id, None)
+        if terms is None:
+            return
+        self.total_length -= self.doc_length.pop(chunk_id)
+        for term in terms:
+            posting = self.postings[term]
+            posting.pop(chunk_id, None)
+            if not posting:
+                del self.postings[term]
+
+    def search(self, query: str, k: int, allowed=None) -> list[tuple[str, float]]:
+        """Top ``k`` chunk ids for ``query``; ``allowed`` optionally filters chunk ids."""
+        n = len(self.doc_terms)
+        if n == 0:
+            return []
+        avg_len = self.total_length / n
+        scores: dict[str, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for chunk_id, tf in posting.items():
+                if allowed is not None and not allowed(chunk_id):
+                    continue
+                norm = tf + self.k1 * (1 - self.b + self.b * self.doc_length[chunk_id] / avg_len)
+                scores[chunk_id] += idf * tf * (self.k1 + 1) / norm
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60) -> list[tuple[str, float]]:
+    """Fuse ranked id lists: score(id) = sum over lists of 1 / (k + rank)."""
+    scores: dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] += 1 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,90 @@
+"""Page-range-parallel PDF text extraction.
+
+Kept free of model clients and other heavy imports so process-pool workers
+can import it cheaply under any multiprocessing start method.
+"""
+import asyncio
+import mmap
+import os
+from collections import deque
+from functools import lru_cache
+
+from langchain_core.documents import Document
+from pypdf import PdfReader
+
+
+@lru_cache(maxsize=4)
+def _reader(pdf_path: str, mtime_ns: int) -> PdfReader:
+    # One reader per file per worker process, so each task only pays for the
+    # pages it extracts rather than re-reading the cross-reference table. The
+    # reader works on a read-only mapping of the file, which all workers share
+    # through the page cache instead of each holding a copy.
+    with open(pdf_path, "rb") as f:
+        return PdfReader(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def _open(pdf_path: str) -> PdfReader:
+    return _reader(pdf_path, os.stat(pdf_path).st_mtime_ns)
+
+
+def count_pages(pdf_path: str) -> int:
+    return len(_open(pdf_path).pages)
+
+
+def parse_pages(pdf_path: str, start: int, end: int) -> list[Document]:
+    """Extract pages [start, end) as one Document per page (same metadata keys as PyPDFLoader)."""
+    reader = _open(pdf_path)
+    total = len(reader.pages)
+    return [
+        Document(
+            page_content=reader.pages[n].extract_text(),
+            metadata={"source": pdf_path, "page": n, "total_pages": total},
+        )
+        for n in range(start, min(end, total))
+    ]
+
+
+def page_ranges(total: int, pages_per_task: int) -> list[tuple[int, int]]:
+    return [(start, min(start + pages_per_task, total)) for start in range(0, total, pages_per_task)]
+
+
+def iter_pages(pdf_path: str, pool, pages_per_task: int = 8, *, window: int):
+    """Yield page batches in document order, parsed across ``pool``.
+
+    At most ``window`` page ranges are in flight at once (about twice the
+    pool's worker count keeps every worker busy), so peak memory depends on
+    the window, not the PDF.
+    """
+    total = pool.submit(count_pages, pdf_path).result()
+    in_flight = deque()
+    for start, end in page_ranges(total, pages_per_task):
+        in_flight.append(pool.submit(parse_pages, pdf_path, start, end))
+        if len(in_flight) >= window:
+            yield in_flight.popleft().result()
+    while in_flight:
+        yield in_flight.popleft().result()
+
+
+async def aiter_pages(pdf_path: str, pool, pages_per_task: int = 8, *, window: int, on_total=None):
+    """Async counterpart of ``iter_pages`` for use inside the event loop."""
+    loop = asyncio.get_running_loop()
+    total = await loop.run_in_executor(pool, count_pages, pdf_path)
+    if on_total is not None:
+        on_total(total)
+    in_flight = deque()
+    try:
+        for start, end in page_ranges(total, pages_per_task):
+            in_flight.append(loop.run_in_executor(pool, parse_pages, pdf_path, start, end))
+            if len(in_flight) >= window:
+                yield await in_flight.popleft()
+        while in_flight:
+            yield await in_flight.popleft()
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+def iter_chunks(pdf_path: str, pool, splitter, pages_per_task: int = 8, *, window: int):
+    """Stream split chunks for a PDF without materialising every page first."""
+    for pages in iter_pages(pdf_path, pool, pages_per_task, window=window):
+        yield from splitter.split_documents(pages)
@@ -1,64 +1,236 @@
+import asyncio
 import os
+import time
 from dotenv import load_dotenv
-from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 
-from azure.ai.inference import EmbeddingsClient, ChatCompletionsClient
+from azure.ai.inference import EmbeddingsClient
+from azure.ai.inference.aio import (
+    ChatCompletionsClient as AsyncChatCompletionsClient,
+    EmbeddingsClient as AsyncEmbeddingsClient,
+)
 from azure.ai.inference.models import SystemMessage, UserMessage
 from azure.core.credentials import AzureKeyCredential
 
+from embedding_batcher import EmbeddingBatcher
+from embedding_cache import EmbeddingCache
+from chunk_dedup import ChunkDeduplicator
+from context_builder import build_context
+from lexical import reciprocal_rank_fusion
+
 load_dotenv()
 
-# Embedding config
+# GitHub Models by default; point elsewhere (e.g. benchmarks/fake_models.py)
+# to run against a local stand-in. The clients connect on first request.
+MODELS_ENDPOINT = os.getenv("GITHUB_MODELS_ENDPOINT", "https://models.github.ai/inference")
+
+# Embedding config. The request path uses the async client; the sync one
+# serves offline scripts that build or evaluate indexes outside the server.
 embedding_client = EmbeddingsClient(
-    endpoint="https://models.github.ai/inference",
+    endpoint=MODELS_ENDPOINT,
+    credential=AzureKeyCredential(os.environ["GITHUB_EMBEDDING_TOKEN"]),
+)
+async_embedding_client = AsyncEmbeddingsClient(
+    endpoint=MODELS_ENDPOINT,
     credential=AzureKeyCredential(os.environ["GITHUB_EMBEDDING_TOKEN"]),
 )
 embedding_model = "openai/text-embedding-3-large"
 
 # Chat model config
-chat_client = ChatCompletionsClient(
-    endpoint="https://models.github.ai/inference",
+chat_client = AsyncChatCompletionsClient(
+    endpoint=MODELS_ENDPOINT,
     credential=AzureKeyCredential(os.environ["GITHUB_CHAT_TOKEN"]),
 )
 chat_model = "openai/gpt-4.1"
 
+# Retrieval config: "hybrid" fuses BM25 and vector results, "vector" is vector-only
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+# Candidates taken from each retriever before fusion, as a multiple of k
+RETRIEVAL_FETCH_FACTOR = 4
+
+# Context config: chunks retrieved as candidates, chunks kept after MMR, and
+# the (estimated) token budget for the context placed in the prompt
+CONTEXT_CANDIDATES = int(os.getenv("CONTEXT_CANDIDATES", "12"))
+CONTEXT_K = int(os.getenv("CONTEXT_K", "4"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))
+
+# Splitter config (part of the index cache key, see index_cache.py)
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+# Chunks at least this similar (estimated Jaccard) to an earlier chunk of the
+# same document are dropped before embedding; 0 disables. Also in the cache key.
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.9"))
+
 # ✅ Fixed embedding wrapper
-class GitHubEmbedding:
-    def __init__(self, client, model):
+class GitHubEmbedding(Embeddings):
+    def __init__(
+        self,
+        client,
+        model,
+        async_client=None,
+        max_batch_tokens=16000,
+        max_batch_size=128,
+        concurrency=4,
+        cache=None,
+    ):
         self.client = client
+        self.async_client = async_client
         self.model = model
+        self.cache = cache
+        self.batcher = EmbeddingBatcher(
+            self._embed_batch,
+            self._aembed_batch,
+            max_batch_tokens=max_batch_tokens,
+            max_batch_size=max_batch_size,
+            concurrency=concurrency,
+        )
 
-    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+    def _embed_batch(self, texts: list[str]) -> list[list[float]]:
         response = self.client.embed(input=texts, model=self.model)
         return [item.embedding for item in response.data]
 
+    async def _aembed_batch(self, texts: list[str]) -> list[list[float]]:
+        response = await self.async_client.embed(input=texts, model=self.model)
+        return [item.embedding for item in response.data]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if self.cache is None:
+            return self.batcher.embed(texts)
+        # Only texts not already in the cache go upstream, each at most once.
+        known = self.cache.get_many(self.model, texts)
+        missing = list(dict.fromkeys(t for t in texts if t not in known))
+        if missing:
+            fresh = dict(zip(missing, self.batcher.embed(missing)))
+            self.cache.put_many(self.model, fresh)
+            known.update(fresh)
+        return [known[t] for t in texts]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        if self.cache is None:
+            return await self.batcher.aembed(texts)
+        known = await asyncio.to_thread(self.cache.get_many, self.model, texts)
+        missing = list(dict.fromkeys(t for t in texts if t not in known))
+        if missing:
+            fresh = dict(zip(missing, await self.batcher.aembed(missing)))
+            await asyncio.to_thread(self.cache.put_many, self.model, fresh)
+            known.update(fresh)
+        return [known[t] for t in texts]
+
     def embed_query(self, text: str) -> list[float]:
         response = self.client.embed(input=[text], model=self.model)
         return response.data[0].embedding
 
+    async def aembed_query(self, text: str) -> list[float]:
+        response = await self.async_client.embed(input=[text], model=self.model)
+        return response.data[0].embedding
+
+    async def aembed_queries(self, texts: list[str]) -> list[list[float]]:
+        # Questions are rarely repeated, so they skip the chunk cache.
+        return await self.batcher.aembed(texts)
+
     def __call__(self, text: str) -> list[float]:
         # For backward compatibility with LangChain expectations
         return self.embed_query(text)
 
 
-def load_and_split_pdf(pdf_path):
-    loader = PyPDFLoader(pdf_path)
-    pages = loader.load()
-    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-    chunks = splitter.split_documents(pages)
-    return chunks
+embeddings = GitHubEmbedding(
+    client=embedding_client,
+    model=embedding_model,
+    async_client=async_embedding_client,
+    max_batch_tokens=int(os.getenv("EMBED_BATCH_TOKENS", "16000")),
+    max_batch_size=int(os.getenv("EMBED_BATCH_SIZE", "128")),
+    concurrency=int(os.getenv("EMBED_CONCURRENCY", "4")),
+    cache=EmbeddingCache(os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache/embeddings.sqlite3")),
+)
+
+
+# start_index lets the context builder trim the overlap between neighbouring chunks exactly.
+splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, add_start_index=True)
+
+def make_deduplicator():
+    return ChunkDeduplicator(DEDUP_THRESHOLD) if DEDUP_THRESHOLD > 0 else None
+
+def elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+async def get_top_k_docs_many(corpus, queries, query_vectors, k=4, doc_ids=None, timings=None):
+    """Retrieve the top-k chunks for each of a batch of already-embedded queries.
+
+    In hybrid mode vector and BM25 rankings are fused, with both retrievers
+    running concurrently; all vector searches go to the index as one
+    multi-query search. Per-stage timings (ms) are written into ``timings``
+    when a dict is passed.
+    """
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
+    fetch = k * RETRIEVAL_FETCH_FACTOR if RETRIEVAL_MODE == "hybrid" else k
+
+    async def vector_search():
+        t = time.perf_counter()
+        ids = await asyncio.to_thread(corpus.vector_candidates_many, query_vectors, fetch, doc_ids)
+        timings["vector_search_ms"] = elapsed_ms(t)
+        return ids
+
+    async def lexical_search():
+        t = time.perf_counter()
+        ids = await asyncio.to_thread(lambda: [corpus.lexical_candidates(q, fetch, doc_ids) for q in queries])
+        timings["lexical_search_ms"] = elapsed_ms(t)
+        return ids
 
-def create_vectorstore(chunks):
-    embeddings = GitHubEmbedding(client=embedding_client, model=embedding_model)
-    return FAISS.from_documents(chunks, embedding=embeddings)
+    if RETRIEVAL_MODE == "hybrid":
+        vector_ids, lexical_ids = await asyncio.gather(vector_search(), lexical_search())
+        t = time.perf_counter()
+        ranked = [
+            [chunk_id for chunk_id, _ in reciprocal_rank_fusion(rankings)[:k]]
+            for rankings in zip(vector_ids, lexical_ids)
+        ]
+        timings["fusion_ms"] = elapsed_ms(t)
+    else:
+        ranked = [ids[:k] for ids in await vector_search()]
 
-def get_top_k_docs(vectorstore, query, k=4):
-    return vectorstore.similarity_search(query, k=k)
+    unique = list(dict.fromkeys(chunk_id for ids in ranked for chunk_id in ids))
+    docs = dict(zip(unique, await asyncio.to_thread(corpus.get_documents, unique)))
+    timings["retrieval_ms"] = elapsed_ms(start)
+    return [[docs[chunk_id] for chunk_id in ids] for ids in ranked]
 
-def generate_answer(docs: list[Document], question: str):
+async def get_context(corpus, query, query_vector, doc_ids=None, timings=None):
+    """Retrieve candidates and pack them into the context for one question.
+
+    Returns the passages and the context builder's stats, including the
+    estimated prompt tokens saved against sending the raw top-k chunks.
+    """
+    results = await get_contexts(corpus, [query], [query_vector], doc_ids, timings)
+    return results[0]
+
+async def get_contexts(corpus, queries, query_vectors, doc_ids=None, timings=None):
+    """``get_context`` for a batch of already-embedded queries."""
+    timings = {} if timings is None else timings
+    if not queries:
+        return []
+    candidates = await get_top_k_docs_many(corpus, queries, query_vectors, CONTEXT_CANDIDATES, doc_ids, timings)
+    start = time.perf_counter()
+    unique = list(dict.fromkeys(doc.id for docs in candidates for doc in docs))
+    stored = await asyncio.to_thread(corpus.get_vectors, unique)
+    row = {chunk_id: i for i, chunk_id in enumerate(unique)}
+    results = [
+        build_context(
+            docs,
+            vector,
+            stored[[row[doc.id] for doc in docs]],
+            k=CONTEXT_K,
+            token_budget=CONTEXT_TOKEN_BUDGET,
+            lambda_mult=CONTEXT_MMR_LAMBDA,
+            max_overlap=CHUNK_OVERLAP * 4,
+        )
+        for docs, vector in zip(candidates, query_vectors)
+    ]
+    timings["context_ms"] = elapsed_ms(start)
+    return results
+
+def build_messages(docs: list[Document], question: str):
     context = "\n\n".join([doc.page_content for doc in docs])
     prompt = f"""Use the following context to answer the question.
 
@@ -67,14 +239,36 @@ Context:
 
 Question: {question}
 Answer:"""
+    return [
+        SystemMessage("You are a helpful assistant."),
+        UserMessage(prompt),
+    ]
 
-    response = chat_client.complete(
-        messages=[
-            SystemMessage("You are a helpful assistant."),
-            UserMessage(prompt),
-        ],
+async def generate_answer(docs: list[Document], question: str):
+    response = await chat_client.complete(
+        messages=build_messages(docs, question),
         temperature=0.7,
         top_p=1,
         model=chat_model
     )
     return response.choices[0].message.content
+
+async def stream_answer(docs: list[Document], question: str):
+    """Yield the answer text in pieces as the chat model produces them."""
+    response = await chat_client.complete(
+        messages=build_messages(docs, question),
+        temperature=0.7,
+        top_p=1,
+        model=chat_model,
+        stream=True,
+    )
+    try:
+        async for update in response:
+            if update.choices and update.choices[0].delta.content:
+                yield update.choices[0].delta.content
+    finally:
+        await response.aclose()
+
+async def close_clients():
+    await async_embedding_client.close()
+    await chat_client.close()
@@ -0,0 +1,300 @@
+import asyncio
+import fcntl
+import math
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from corpus import Corpus
+
+SESSION_ID_RE = re.compile(r"[A-Za-z0-9_-]{1,64}")
+LOAD_ATTEMPTS = 3
+
+
+class SessionTooLarge(Exception):
+    pass
+
+
+def valid_session_id(session_id: str) -> bool:
+    # Session ids become file names, so keep them to a safe alphabet.
+    return SESSION_ID_RE.fullmatch(session_id) is not None
+
+
+def version_dir(version: int) -> str:
+    return f"v{version:010d}"
+
+
+class SessionRegistry:
+    """One corpus per session, published on disk and shared by worker processes.
+
+    Each session directory under ``root`` holds immutable snapshots
+    (``v<version>/``) and a ``CURRENT`` file naming the latest one. ``write``
+    takes an exclusive file lock on the session, loads the latest snapshot
+    into private memory, lets the caller change it, saves a new snapshot and
+    atomically replaces ``CURRENT``. Readers map the current snapshot's index
+    read-only, so every worker shares one copy through the page cache, and
+    reload as soon as a request sees that ``CURRENT`` has moved on. The
+    previous snapshot is kept for readers still opening it; older ones are
+    removed.
+
+    ``acquire`` returns a session's read-only corpus and pins it until
+    ``release``. Loaded corpora stay in memory up to ``max_bytes``, as
+    estimated by ``Corpus.memory_bytes``; beyond that the least recently used
+    unpinned ones are dropped (they are already on disk).
+
+    Every write loads and re-saves the session's whole snapshot, so
+    ingesting or deleting a document costs time and disk writes
+    proportional to the session's corpus, not to the change, and the
+    writer's private copy sits in memory next to any mapped one. Whole
+    immutable snapshots are what let readers in other processes map the
+    index without coordination. To bound that cost, a write that would grow
+    a corpus past ``max_session_bytes`` raises ``SessionTooLarge`` instead of
+    publishing (writes that shrink it are always allowed), and private copies
+    count towards ``max_bytes``, so resident readers are evicted to make room.
+
+    The sync methods do disk I/O; ``use`` and ``write`` run them in threads.
+    """
+
+    def __init__(
+        self, embeddings, index_config, root: str, max_bytes: int, max_session_bytes: int = 0,
+        keep_load_times: int = 1000,
+    ):
+        self.embeddings = embeddings
+        self.index_config = index_config
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_session_bytes = max_session_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.resident: OrderedDict[str, Corpus] = OrderedDict()
+        self.pins: dict[str, int] = {}
+        # Estimated size of each private copy held by a writer in this process.
+        self.writing: dict[str, int] = {}
+        # Guards the fields above and the counters; never held during disk reads.
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.created = 0
+        self.evictions = 0
+        self.publishes = 0
+        self.load_seconds: deque[float] = deque(maxlen=keep_load_times)
+
+    def _path(self, session_id: str) -> Path:
+        return self.root / session_id
+
+    def _check(self, session_id: str) -> None:
+        if not valid_session_id(session_id):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+
+    def published_version(self, session_id: str) -> int | None:
+        try:
+            name = (self._path(session_id) / "CURRENT").read_text().strip()
+        except FileNotFoundError:
+            return None
+        return int(name[1:])
+
+    def _full_vectors_path(self, session_id: str) -> str:
+        return str(self._path(session_id) / "full.f32")
+
+    def _new_corpus(self, session_id: str) -> Corpus:
+        return Corpus(self.embeddings, self.index_config, full_vectors_path=self._full_vectors_path(session_id))
+
+    def _load(self, session_id: str, mmap: bool) -> Corpus | None:
+        # A writer may publish and prune between reading CURRENT and opening
+        # the snapshot; re-read CURRENT and try again.
+        for attempt in range(LOAD_ATTEMPTS):
+            version = self.published_version(session_id)
+            if version is None:
+                return None
+            try:
+                return Corpus.load(
+                    str(self._path(session_id) / version_dir(version)),
+                    self.embeddings,
+                    self.index_config,
+                    full_vectors_path=self._full_vectors_path(session_id),
+                    mmap=mmap,
+                )
+            except (FileNotFoundError, RuntimeError):
+                if attempt == LOAD_ATTEMPTS - 1:
+                    raise
+
+    def acquire(self, session_id: str) -> Corpus:
+        self._check(session_id)
+        published = self.published_version(session_id)
+        with self._lock:
+            corpus = self._pin_if_current(session_id, published)
+            if corpus is not None:
+                return corpus
+            load_lock = self._load_locks.setdefault(session_id, threading.Lock())
+        # Snapshots are read under the session's own lock, so a slow load
+        # holds up only other requests for the same session.
+        with load_lock:
+            published = self.published_version(session_id)
+            with self._lock:
+                corpus = self._pin_if_current(session_id, published)
+                if corpus is not None:
+                    return corpus
+                stale = session_id in self.resident
+            start = time.perf_counter()
+            loaded = self._load(session_id, mmap=True)
+            seconds = time.perf_counter() - start
+            with self._lock:
+                if loaded is not None:
+                    if stale:
+                        self.reloads += 1
+                    else:
+                        self.misses += 1
+                    self.load_seconds.append(seconds)
+                    corpus = loaded
+                else:
+                    self.created += 1
+                    corpus = self._new_corpus(session_id)
+                    corpus.read_only = True
+                self.resident[session_id] = corpus
+                return self._pin(session_id)
+
+    def _pin_if_current(self, session_id: str, published: int | None) -> Corpus | None:
+        corpus = self.resident.get(session_id)
+        if corpus is None or (published is not None and corpus.version < published):
+            return None
+        self.hits += 1
+        return self._pin(session_id)
+
+    def _pin(self, session_id: str) -> Corpus:
+        self.resident.move_to_end(session_id)
+        self.pins[session_id] = self.pins.get(session_id, 0) + 1
+        self._evict()
+        return self.resident[session_id]
+
+    def release(self, session_id: str) -> None:
+        with self._lock:
+            self.pins[session_id] -= 1
+            if not self.pins[session_id]:
+                del self.pins[session_id]
+            self._evict()
+
+    @asynccontextmanager
+    async def use(self, session_id: str):
+        """Read-only access to a session's current corpus."""
+        corpus = await asyncio.to_thread(self.acquire, session_id)
+        try:
+            yield corpus
+        finally:
+            await asyncio.to_thread(self.release, session_id)
+
+    @asynccontextmanager
+    async def write(self, session_id: str):
+        """A private, writable copy of the session's corpus, published on exit.
+
+        Writers to the same session, in any process, are serialised by a file
+        lock. Nothing is published if the block raises or changes nothing, or
+        if the change grows the corpus past ``max_session_bytes``.
+        """
+        corpus, lock_file = await asyncio.to_thread(self._begin_write, session_id)
+        try:
+            start_version = corpus.version
+            start_bytes = self.writing[session_id]
+            yield corpus
+            if corpus.version != start_version:
+                size = corpus.memory_bytes()
+                if self.max_session_bytes and size > max(self.max_session_bytes, start_bytes):
+                    raise SessionTooLarge(f"Session {session_id} would exceed {self.max_session_bytes} bytes")
+                await asyncio.to_thread(self._publish, session_id, corpus)
+        finally:
+            lock_file.close()
+            with self._lock:
+                del self.writing[session_id]
+
+    def _begin_write(self, session_id: str):
+        self._check(session_id)
+        path = self._path(session_id)
+        path.mkdir(parents=True, exist_ok=True)
+        lock_file = open(path / ".lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            corpus = self._load(session_id, mmap=False) or self._new_corpus(session_id)
+        except BaseException:
+            lock_file.close()
+            raise
+        with self._lock:
+            self.writing[session_id] = corpus.memory_bytes()
+            self._evict()
+        return corpus, lock_file
+
+    def _publish(self, session_id: str, corpus: Corpus) -> None:
+        path = self._path(session_id)
+        name = version_dir(corpus.version)
+        tmp = path / f".tmp-{name}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        corpus.save(str(tmp))
+        if corpus.full_vectors is not None:
+            corpus.full_vectors.data.flush()
+            (tmp / "FULL_VECTORS").write_text(os.path.basename(corpus.full_vectors.path))
+        # Left over if a writer died between renaming its snapshot and updating CURRENT.
+        shutil.rmtree(path / name, ignore_errors=True)
+        os.rename(tmp, path / name)
+        pointer = path / ".CURRENT.tmp"
+        pointer.write_text(name)
+        os.replace(pointer, path / "CURRENT")
+        self.publishes += 1
+        self._prune(path)
+
+    def _prune(self, path: Path, keep: int = 2) -> None:
+        versions = sorted(p for p in path.iterdir() if p.is_dir() and p.name.startswith("v"))
+        kept = versions[-keep:]
+        for old in versions[:-keep]:
+            shutil.rmtree(old, ignore_errors=True)
+        # Full-vector files left behind by compaction once no kept snapshot uses them.
+        in_use = {(v / "FULL_VECTORS").read_text() for v in kept if (v / "FULL_VECTORS").exists()}
+        for f in path.glob("*.f32"):
+            if f.name not in in_use:
+                f.unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        sizes = {sid: corpus.memory_bytes() for sid, corpus in self.resident.items()}
+        total = sum(sizes.values()) + sum(self.writing.values())
+        for session_id in list(self.resident):
+            if total <= self.max_bytes:
+                break
+            if session_id in self.pins:
+                continue
+            del self.resident[session_id]
+            total -= sizes[session_id]
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        # Disk scan first: the registry lock is never held during disk reads.
+        stored = [p for p in self.root.iterdir() if (p / "CURRENT").exists()]
+        with self._lock:
+            resident = list(self.resident.values())
+            writing_bytes = sum(self.writing.values())
+            pinned = len(self.pins)
+            loads = sorted(self.load_seconds)
+            hits, misses, reloads = self.hits, self.misses, self.reloads
+            created, evictions, publishes = self.created, self.evictions, self.publishes
+        total = hits + misses + reloads
+        return {
+            "resident_sessions": len(resident),
+            "stored_sessions": len(stored),
+            "pinned_sessions": pinned,
+            "resident_bytes": sum(c.memory_bytes() for c in resident),
+            "writing_bytes": writing_bytes,
+            "max_bytes": self.max_bytes,
+            "max_session_bytes": self.max_session_bytes,
+            "hits": hits,
+            "misses": misses,
+            "reloads": reloads,
+            "hit_rate": hits / total if total else 0.0,
+            "created": created,
+            "evictions": evictions,
+            "publishes": publishes,
+            "load_ms_avg": round(sum(loads) / len(loads) * 1000, 2) if loads else None,
+            "load_ms_p95": round(loads[math.ceil(0.95 * len(loads)) - 1] * 1000, 2) if loads else None,
+            "load_ms_max": round(loads[-1] * 1000, 2) if loads else None,
+        }
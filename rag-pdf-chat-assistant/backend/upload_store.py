@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UploadStore:
+    """Uploaded PDFs waiting to be ingested, kept for at most ``ttl`` seconds.
+
+    ``save`` copies an upload into ``directory`` in fixed-size chunks,
+    hashing as it goes, so neither the hash nor the copy needs the whole
+    file in memory. Files are written under a ``.part`` name and renamed
+    once complete. Ingestion deletes a file when its job finishes;
+    ``sweep`` removes anything older than ``ttl`` that no job still needs
+    (left behind by a crash or a failed request).
+    """
+
+    def __init__(self, directory: str, ttl: float = 3600, max_bytes: int | None = None, chunk_size: int = 1 << 20):
+        # Absolute, so a later chdir does not move where uploads are written
+        self.directory = os.path.abspath(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.removed = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    async def save(self, upload) -> tuple[str, str, int]:
+        """Copy an upload (anything with an async ``read(n)``) to disk; returns (path, sha256 hex, size)."""
+        name = uuid.uuid4().hex
+        part = os.path.join(self.directory, f"{name}.part")
+        digest = hashlib.sha256()
+        size = 0
+        f = await asyncio.to_thread(open, part, "wb")
+        try:
+            while chunk := await upload.read(self.chunk_size):
+                size += len(chunk)
+                if self.max_bytes is not None and size > self.max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds {self.max_bytes} bytes")
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+            f.close()
+            path = os.path.join(self.directory, f"{name}.pdf")
+            os.replace(part, path)
+        except BaseException:
+            f.close()
+            self.discard(part)
+            raise
+        return path, digest.hexdigest(), size
+
+    def discard(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def sweep(self, keep: set[str] = frozenset()) -> int:
+        """Remove files older than ``ttl`` except those in ``keep``; returns how many."""
+        cutoff = time.time() - self.ttl
+        removed = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.path in keep or not entry.is_file():
+                    continue
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        removed += 1
+                except OSError:
+                    pass
+        self.removed += removed
+        return removed
+
+    async def run_sweeper(self, keep, interval: float = 300) -> None:
+        """Call ``sweep(keep())`` every ``interval`` seconds until cancelled."""
+        while True:
+            try:
+                await asyncio.to_thread(self.sweep, keep())
+            except Exception as e:
+                print(f"Error sweeping uploads: {e}")
+            await asyncio.sleep(interval)
+
+    def stats(self) -> dict:
+        files = total = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    files += 1
+                    total += entry.stat().st_size
+        return {"files": files, "bytes": total, "ttl": self.ttl, "swept": self.removed}
@@ -0,0 +1,102 @@
+import os
+import re
+
+import numpy as np
+
+GENERATION_RE = re.compile(r"^(.*?)(?:\.(\d+))?(\.[^.]*)$")
+
+
+def next_generation(path: str) -> str:
+    """``full.f32`` -> ``full.1.f32`` -> ``full.2.f32``."""
+    stem, n, ext = GENERATION_RE.match(path).groups()
+    return f"{stem}.{int(n or 0) + 1}{ext}"
+
+
+def rerank(query, candidates: np.ndarray, n: int) -> np.ndarray:
+    """Positions of the ``n`` rows of ``candidates`` closest (L2) to ``query``."""
+    q = np.asarray(query, dtype=np.float32)
+    distances = ((candidates - q) ** 2).sum(axis=1)
+    return np.argsort(distances, kind="stable")[:n]
+
+
+class VectorFile:
+    """Float32 vectors in a memory-mapped file, addressed by key.
+
+    Rows are appended; deleting a key only forgets its row. Once more than
+    half of the file is garbage the live rows are copied to a new file
+    (``next_generation`` of the path) rather than moved in place, so other
+    processes still mapping the old file are unaffected; removing old
+    generations is left to the owner. Reads fault in just the pages holding
+    the requested rows, so the vectors do not have to fit in RAM.
+    """
+
+    def __init__(self, path: str, dim: int, initial_rows: int = 1024):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.dim = dim
+        self.rows: dict = {}
+        self.size = 0
+        self.initial_rows = initial_rows
+        self._open(initial_rows, mode="w+")
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, key) -> bool:
+        return key in self.rows
+
+    def __getstate__(self) -> dict:
+        # Pickles record where the rows are; the vectors stay in the file.
+        self.data.flush()
+        state = self.__dict__.copy()
+        del state["data"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._open(self.capacity)
+
+    def _open(self, capacity: int, mode: str = "r+") -> None:
+        self.capacity = capacity
+        self.data = np.memmap(self.path, dtype=np.float32, mode=mode, shape=(capacity, self.dim))
+
+    def _grow(self, needed: int) -> None:
+        self.data.flush()
+        del self.data
+        capacity = max(needed, 2 * self.capacity)
+        with open(self.path, "r+b") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._open(capacity)
+
+    def put_many(self, keys: list, vectors) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        self.delete_many([k for k in keys if k in self.rows])
+        end = self.size + len(keys)
+        if end > self.capacity:
+            self._grow(end)
+        self.data[self.size : end] = vectors
+        for row, key in enumerate(keys, start=self.size):
+            self.rows[key] = row
+        self.size = end
+
+    def get_many(self, keys: list) -> np.ndarray:
+        return np.asarray(self.data[[self.rows[k] for k in keys]])
+
+    def delete_many(self, keys: list) -> None:
+        for key in keys:
+            self.rows.pop(key, None)
+        if self.size > self.initial_rows and self.size > 2 * len(self.rows):
+            self.compact()
+
+    def compact(self, batch: int = 4096) -> None:
+        keys = [key for key, _ in sorted(self.rows.items(), key=lambda item: item[1])]
+        target = VectorFile(next_generation(self.path), self.dim, max(len(keys), self.initial_rows))
+        for start in range(0, len(keys), batch):
+            target.put_many(keys[start : start + batch], self.get_many(keys[start : start + batch]))
+        target.initial_rows = self.initial_rows
+        self.data.flush()
+        self.__dict__.update(target.__dict__)
+
+    @property
+    def nbytes(self) -> int:
+        return self.capacity * self.dim * 4
@@ -1,16 +1,31 @@
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import axios from "axios";
 import { PaperClipIcon, ArrowUpTrayIcon, ChatBubbleBottomCenterTextIcon } from "@heroicons/react/24/solid";
 
 
+// Each browser gets its own document session on the server.
+function getSessionId() {
+  let id = localStorage.getItem("sessionId");
+  if (!id) {
+    id = crypto.randomUUID();
+    localStorage.setItem("sessionId", id);
+  }
+  return id;
+}
+
 export default function Home() {
   const [file, setFile] = useState(null);
   const [question, setQuestion] = useState("");
   const [answer, setAnswer] = useState("");
+  const [sources, setSources] = useState([]);
   const [uploading, setUploading] = useState(false);
+  const [uploadProgress, setUploadProgress] = useState("");
   const [asking, setAsking] = useState(false);
   const [uploadError, setUploadError] = useState("");
   const [askError, setAskError] = useState("");
+  const [sessionId, setSessionId] = useState("");
+
+  useEffect(() => setSessionId(getSessionId()), []);
 
   const handleUpload = async () => {
     if (!file) {
@@ -22,13 +37,30 @@ export default function Home() {
     try {
       const formData = new FormData();
       formData.append("file", file);
-      await axios.post("http://localhost:8000/upload/", formData);
+      const res = await axios.post("http://localhost:8000/upload/", formData, {
+        headers: { "X-Session-Id": sessionId },
+      });
+      // Ingestion runs in the background; poll the job until it finishes.
+      let job = res.data;
+      while (job.status === "queued" || job.status === "running") {
+        setUploadProgress(
+          job.total_pages
+            ? `Processing: ${job.pages_parsed}/${job.total_pages} pages parsed, ${job.chunks_embedded} chunks embedded`
+            : "Waiting in queue..."
+        );
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        job = (await axios.get(`http://localhost:8000/jobs/${job.job_id}`)).data;
+      }
+      if (job.status === "failed") {
+        throw new Error(job.error || "Processing failed");
+      }
       setUploadError("");
       alert("PDF uploaded and processed."); // Could replace with toast in future
     } catch (error) {
-      setUploadError(error?.response?.data?.detail || error.message || "Upload failed");
+      setUploadError(error?.response?.data?.error || error?.response?.data?.detail || error.message || "Upload failed");
     } finally {
       setUploading(false);
+      setUploadProgress("");
     }
   };
 
@@ -40,14 +72,40 @@ export default function Home() {
     setAskError("");
     setAsking(true);
     setAnswer("");
+    setSources([]);
     try {
       const formData = new FormData();
       formData.append("question", question);
-      const res = await axios.post("http://localhost:8000/ask/", formData);
-      setAnswer(res.data.answer);
+      // Server-sent events over POST: sources first, then answer tokens.
+      const res = await fetch("http://localhost:8000/ask/stream/", {
+        method: "POST",
+        headers: { "X-Session-Id": sessionId },
+        body: formData,
+      });
+      if (!res.ok || !res.headers.get("content-type")?.includes("text/event-stream")) {
+        const data = await res.json().catch(() => ({}));
+        throw new Error(data.error || data.detail || `Request failed (${res.status})`);
+      }
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split("\n\n");
+        buffer = events.pop();
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || "{}");
+          if (event === "sources") setSources(data);
+          else if (event === "token") setAnswer((prev) => prev + data.text);
+          else if (event === "error") throw new Error(data.detail);
+        }
+      }
       setAskError("");
     } catch (error) {
-      setAskError(error?.response?.data?.detail || error.message || "Failed to get answer");
+      setAskError(error.message || "Failed to get answer");
     } finally {
       setAsking(false);
     }
@@ -80,6 +138,7 @@ export default function Home() {
           "
         />
         {uploadError && <p className="text-red-600 mb-3 font-medium">{uploadError}</p>}
+        {uploadProgress && <p className="text-gray-600 mb-3 text-sm">{uploadProgress}</p>}
 
         <button
           onClick={handleUpload}
@@ -176,6 +235,23 @@ export default function Home() {
             <p className="text-gray-700">{answer}</p>
           </div>
         )}
+
+        {sources.length > 0 && (
+          <div className="mt-6">
+            <h3 className="font-semibold mb-3 text-gray-800">Sources:</h3>
+            <ul className="space-y-2">
+              {sources.map((source, i) => (
+                <li key={i} className="text-sm text-gray-600 bg-gray-50 border border-gray-200 rounded-md p-3">
+                  <span className="font-medium text-gray-800">
+                    Page {source.page != null ? source.page + 1 : "?"}:
+                  </span>{" "}
+                  {source.content.slice(0, 200)}
+                  {source.content.length > 200 && "…"}
+                </li>
+              ))}
+            </ul>
+          </div>
+        )}
       </section>
     </div>
   );